@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the correlated-CSV analysis scripts (ci_stats.py,
+rtt_enrich.py, plot_ci_rtt_scatter.py): the string-encoded list parsers and a
+cached CSV loader so chained invocations in one process never reparse the
+same file.
+"""
+import csv
+import functools
+from ast import literal_eval
+from typing import List, Optional, Tuple
+
+try:
+    import pandas as pd  # type: ignore
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.csv as pacsv  # type: ignore
+except ImportError:
+    pa = None
+    pacsv = None
+
+
+def parse_list_of_ints(value: str) -> List[int]:
+    """Parse a string representation of a list/tuple into a list of integers.
+
+    Uses a fast split-based scanner (literal_eval builds a full AST per row and
+    dominates runtime on large CSVs); falls back to literal_eval for anything
+    the fast path cannot handle.
+    """
+    if value is None:
+        return []
+    value = value.strip()
+    if not value:
+        return []
+    if value[0] in "[(" and value[-1] in ")]":
+        try:
+            out = []
+            for t in value[1:-1].split(","):
+                t = t.strip()
+                if t and t not in ("None", "null"):
+                    out.append(int(t))
+            return out
+        except ValueError:
+            pass
+    try:
+        parsed = literal_eval(value)
+        if isinstance(parsed, (list, tuple)):
+            return [int(x) for x in parsed if x is not None]
+    except Exception:
+        pass
+    return []
+
+
+def parse_list_of_optional_ints(value: str) -> List[Optional[int]]:
+    """Like parse_list_of_ints, but None/null entries are kept as None.
+
+    Use this when the output must stay index-aligned with a parallel list
+    (e.g. ci_list next to rtt_list): dropping placeholders would shift every
+    later position.
+    """
+    if value is None:
+        return []
+    value = value.strip()
+    if not value:
+        return []
+    if value[0] in "[(" and value[-1] in ")]":
+        try:
+            out: List[Optional[int]] = []
+            for t in value[1:-1].split(","):
+                t = t.strip()
+                if not t:
+                    continue
+                out.append(None if t in ("None", "null") else int(t))
+            return out
+        except ValueError:
+            pass
+    try:
+        parsed = literal_eval(value)
+        if isinstance(parsed, (list, tuple)):
+            return [None if x is None else int(x) for x in parsed]
+    except Exception:
+        pass
+    return []
+
+
+def parse_list_of_floats(value: str) -> List[Optional[float]]:
+    """Parse a string representation of a list/tuple into a list of floats.
+
+    Fast path mirrors parse_list_of_ints; None entries are preserved so the
+    output stays aligned with its source list.
+    """
+    if isinstance(value, str):
+        s = value.strip()
+        if s and s[0] in "[(" and s[-1] in ")]":
+            try:
+                out: List[Optional[float]] = []
+                for t in s[1:-1].split(","):
+                    t = t.strip()
+                    if not t:
+                        continue
+                    out.append(None if t in ("None", "null") else float(t))
+                return out
+            except ValueError:
+                pass
+    try:
+        xs = literal_eval(value) if isinstance(value, str) else value
+        if isinstance(xs, (list, tuple)):
+            out = []
+            for x in xs:
+                if x is None:
+                    out.append(None)
+                else:
+                    try:
+                        out.append(float(x))
+                    except Exception:
+                        out.append(None)
+            return out
+    except Exception:
+        return []
+    return []
+
+
+def parse_ip_list(value: Optional[str]) -> List[str]:
+    # Fast split-based path; literal_eval only as fallback since it builds a
+    # full AST per row and dominates parse cost on large CSVs.
+    if value is None:
+        return []
+    s = str(value).strip()
+    if not s:
+        return []
+    if s[0] in "[(" and s[-1] in ")]":
+        out: List[str] = []
+        for t in s[1:-1].split(","):
+            t = t.strip()
+            if not t or t in ("None", "null"):
+                continue
+            if len(t) >= 2 and t[0] in "\"'" and t[-1] == t[0]:
+                t = t[1:-1]
+            out.append(t)
+        return out
+    try:
+        parsed = literal_eval(s)
+        if isinstance(parsed, (list, tuple)):
+            return [str(x) for x in parsed if x is not None]
+    except Exception:
+        return []
+    return []
+
+
+def load_correlated(
+    csv_path: str,
+    usecols: Optional[frozenset] = None,
+    dtype_items: Optional[Tuple[Tuple[str, str], ...]] = None,
+) -> "pd.DataFrame":
+    """
+    Cached pd.read_csv for the correlated CSVs. Arguments must be hashable
+    (frozenset / tuple of items) so the cache key is stable; when the three
+    stats scripts are driven from one process the file is parsed only once.
+    usecols is applied as a membership callable so missing optional columns do
+    not raise; dtype lets the C parser convert numerics inline.
+
+    Callers get a shallow copy: the column buffers are shared (so repeat loads
+    stay cheap), but adding or replacing columns cannot leak into the cached
+    frame handed to later callers.
+    """
+    return _load_correlated_cached(csv_path, usecols, dtype_items).copy(deep=False)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_correlated_cached(
+    csv_path: str,
+    usecols: Optional[frozenset],
+    dtype_items: Optional[Tuple[Tuple[str, str], ...]],
+) -> "pd.DataFrame":
+    if pd is None:
+        raise ImportError("Pandas is required. Install pandas and retry.")
+    if pacsv is not None:
+        return _read_csv_arrow(csv_path, usecols, dtype_items)
+    kwargs = {}
+    if usecols is not None:
+        kwargs["usecols"] = lambda c: c in usecols
+    if dtype_items is not None:
+        kwargs["dtype"] = dict(dtype_items)
+    return pd.read_csv(csv_path, engine="c", **kwargs)
+
+
+_ARROW_TYPES = {
+    "float32": "float32",
+    "float64": "float64",
+    "int64": "int64",
+    "string": "string",
+}
+
+# Columns the scripts echo back into their output verbatim. Pinned to string
+# so Arrow's type inference cannot reformat them — left alone it parses
+# readable_time as a timestamp, which re-renders "2025-10-07T10:00:00" as
+# "2025-10-07 10:00:00" on the way back out. Entries for columns absent from
+# a given file are ignored by the reader.
+_ARROW_STRING_COLUMNS = ("readable_time",)
+
+
+def _read_csv_arrow(
+    csv_path: str,
+    usecols: Optional[frozenset],
+    dtype_items: Optional[Tuple[Tuple[str, str], ...]],
+) -> "pd.DataFrame":
+    """
+    Arrow's multithreaded CSV reader parses columns in parallel and is
+    markedly faster than pandas' C parser on wide files. The header is peeked
+    first so include_columns only names columns that actually exist
+    (preserving the lenient usecols semantics of the pandas path).
+    """
+    include = None
+    if usecols is not None:
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+        include = [c for c in header if c in usecols]
+    column_types = {c: pa.string() for c in _ARROW_STRING_COLUMNS}
+    if dtype_items is not None:
+        column_types.update(
+            (c, getattr(pa, _ARROW_TYPES[t])())
+            for c, t in dtype_items
+            if t in _ARROW_TYPES
+        )
+    table = pacsv.read_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(use_threads=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types, include_columns=include
+        ),
+    )
+    # Arrow-backed pandas dtypes keep the string columns (ci_list etc.) as
+    # large_string buffers instead of per-row Python objects — roughly half
+    # the resident memory of an object-dtype frame.
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
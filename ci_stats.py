@@ -1,16 +1,238 @@
 #!/usr/bin/env python3
 import argparse
-import math
+import csv
 import sys
-from ast import literal_eval
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Optional
+
+from ci_common import (
+    load_correlated,
+    parse_list_of_floats,
+    parse_list_of_ints,
+    parse_list_of_optional_ints,
+)
 
 try:
     import pandas as pd  # type: ignore
 except ImportError:
     pd = None
 
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    np = None
+
+try:
+    import numba  # type: ignore
+except ImportError:
+    numba = None
+
+
+if numba is not None:
+    # The byte buffers come from np.frombuffer and are read-only; the string
+    # signature syntax can only spell writable arrays, so the buffer type is
+    # built explicitly (otherwise dispatch fails with "No matching definition
+    # for argument type(s) readonly array(uint8, 1d, C)").
+    _u1_ro = numba.types.Array(numba.types.uint8, 1, "C", readonly=True)
+    _i8 = numba.types.int64
+    _f8 = numba.types.float64
+    _b1 = numba.types.boolean
+
+    @numba.njit(
+        numba.types.Tuple((_i8[:], _b1[:]))(_u1_ro, _i8[:], _i8[:]),
+        cache=True,
+        fastmath=True,
+        boundscheck=False,
+    )
+    def _parse_and_min(buf, starts, ends):  # pragma: no cover - requires numba
+        """
+        Scan digit runs in each row's byte slice and keep the running min.
+
+        Explicit scalar-accumulator loop (rather than np.min) so LLVM can
+        vectorize the inner scan.
+        """
+        n = starts.shape[0]
+        mins = np.zeros(n, dtype=np.int64)
+        has_value = np.zeros(n, dtype=np.bool_)
+        for i in range(n):
+            best = 0
+            found = False
+            cur = 0
+            in_num = False
+            for j in range(starts[i], ends[i]):
+                c = buf[j]
+                if 48 <= c <= 57:
+                    cur = cur * 10 + (c - 48)
+                    in_num = True
+                elif in_num:
+                    if not found or cur < best:
+                        best = cur
+                        found = True
+                    cur = 0
+                    in_num = False
+            if in_num and (not found or cur < best):
+                best = cur
+                found = True
+            mins[i] = best
+            has_value[i] = found
+        return mins, has_value
+
+    @numba.njit(_f8(_u1_ro, _i8, _i8), cache=True, fastmath=True, boundscheck=False)
+    def _parse_float_bytes(data, start, end):  # pragma: no cover - requires numba
+        """Parse a plain decimal float from a byte slice; NaN if empty/invalid."""
+        i = start
+        while i < end and data[i] == 32:
+            i += 1
+        if i >= end:
+            return np.nan
+        sign = 1.0
+        if data[i] == 45:
+            sign = -1.0
+            i += 1
+        elif data[i] == 43:
+            i += 1
+        got = False
+        val = 0.0
+        while i < end and 48 <= data[i] <= 57:
+            val = val * 10.0 + (data[i] - 48)
+            i += 1
+            got = True
+        if i < end and data[i] == 46:
+            i += 1
+            frac = 0.1
+            while i < end and 48 <= data[i] <= 57:
+                val += (data[i] - 48) * frac
+                frac *= 0.1
+                i += 1
+                got = True
+        if not got:
+            return np.nan
+        return sign * val
+
+    @numba.njit(numba.types.Tuple((_i8, _b1))(_u1_ro, _i8, _i8), cache=True, fastmath=True, boundscheck=False)
+    def _min_digit_runs(data, start, end):  # pragma: no cover - requires numba
+        """Min over all digit runs in a byte slice; (min, found)."""
+        best = 0
+        found = False
+        cur = 0
+        in_num = False
+        for j in range(start, end):
+            c = data[j]
+            if 48 <= c <= 57:
+                cur = cur * 10 + (c - 48)
+                in_num = True
+            elif in_num:
+                if not found or cur < best:
+                    best = cur
+                    found = True
+                cur = 0
+                in_num = False
+        if in_num and (not found or cur < best):
+            best = cur
+            found = True
+        return best, found
+
+    @numba.njit(
+        ["f8[:](i2[:], f4[:], i8[:])", "f8[:](i4[:], f4[:], i8[:])"],
+        cache=True,
+        fastmath=True,
+        boundscheck=False,
+    )
+    def _best_rtt_at_min_ci(ci_flat, rtt_flat, offsets):  # pragma: no cover
+        """
+        For each CSR row, find the first index holding the min CI and return
+        the RTT stored there; NaN for empty rows. One fused pass over two
+        contiguous arrays instead of two Python passes per row.
+        """
+        n = offsets.shape[0] - 1
+        out = np.full(n, np.nan, dtype=np.float64)
+        for row in range(n):
+            best = 0
+            bi = -1
+            for j in range(offsets[row], offsets[row + 1]):
+                v = ci_flat[j]
+                if bi < 0 or v < best:
+                    best = v
+                    bi = j
+            if bi >= 0:
+                out[row] = rtt_flat[bi]
+        return out
+
+    @numba.njit(
+        numba.types.Tuple((_f8[:], _i8[:], _b1[:], _i8[:], _i8))(_u1_ro, _i8, _i8, _i8, _i8),
+        cache=True,
+        fastmath=True,
+        boundscheck=False,
+    )
+    def _stream_aggregate(data, sel_col, ci_col, ts_col, max_rows):  # pragma: no cover
+        """
+        One-pass CSV scan over the raw body bytes (header already stripped):
+        quote-aware field splitting plus inline float/int parsing, returning
+        per-row selected CI, min of the ci_list field, and the row's hour.
+        Scalar accumulators in plain loops so LLVM can vectorize.
+        """
+        sel = np.full(max_rows, np.nan, dtype=np.float64)
+        row_min = np.zeros(max_rows, dtype=np.int64)
+        has_min = np.zeros(max_rows, dtype=np.bool_)
+        hour = np.full(max_rows, -1, dtype=np.int64)
+        n = data.shape[0]
+        i = 0
+        row = 0
+        while i < n and row < max_rows:
+            col = 0
+            saw_field = False
+            while i < n:
+                # Field start: quoted fields may contain commas/newlines and
+                # escape quotes by doubling them.
+                if data[i] == 34:
+                    i += 1
+                    start = i
+                    while i < n:
+                        if data[i] == 34:
+                            if i + 1 < n and data[i + 1] == 34:
+                                i += 2
+                                continue
+                            break
+                        i += 1
+                    end = i
+                    if i < n:
+                        i += 1
+                else:
+                    start = i
+                    while i < n and data[i] != 44 and data[i] != 10 and data[i] != 13:
+                        i += 1
+                    end = i
+                saw_field = True
+
+                if col == sel_col:
+                    sel[row] = _parse_float_bytes(data, start, end)
+                elif col == ci_col:
+                    m, found = _min_digit_runs(data, start, end)
+                    row_min[row] = m
+                    has_min[row] = found
+                elif col == ts_col:
+                    ts = _parse_float_bytes(data, start, end)
+                    if ts == ts:  # not NaN
+                        hour[row] = np.int64(ts) // 3600
+
+                if i < n and data[i] == 13:
+                    i += 1
+                if i >= n:
+                    break
+                if data[i] == 44:
+                    i += 1
+                    col += 1
+                    continue
+                if data[i] == 10:
+                    i += 1
+                    break
+                # Stray bytes after a closing quote: skip to next delimiter.
+                while i < n and data[i] != 44 and data[i] != 10:
+                    i += 1
+            if saw_field:
+                row += 1
+        return sel, row_min, has_min, hour, row
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -36,6 +258,14 @@ def parse_args() -> argparse.Namespace:
             "Use RTT-enriched data to compare latency of selected IP vs latency at per-row min CI."
         ),
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Stream the CSV row-by-row (no pandas/DataFrame) and aggregate in "
+            "one pass; peak memory stays O(unique hours) instead of O(rows)."
+        ),
+    )
     parser.add_argument(
         "--rtt-csv",
         default=str(Path("output") / "rtt_enriched_correlated_ping_dns.csv"),
@@ -44,137 +274,177 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def parse_list_of_ints(value: str) -> List[int]:
-    """Parse a string representation of a list/tuple into a list of integers."""
-    if value is None:
-        return []
-    value = value.strip()
-    if not value:
-        return []
-    try:
-        parsed = literal_eval(value)
-        if isinstance(parsed, (list, tuple)):
-            return [int(x) for x in parsed if x is not None]
-    except Exception:
-        pass
-    return []
+def load_dataframe(
+    csv_path: Path,
+    usecols: Optional[set] = None,
+    dtype: Optional[dict] = None,
+) -> "pd.DataFrame":
+    """Load and validate CSV file.
 
-
-def parse_list_of_floats(value: str) -> List[Optional[float]]:
-    """Parse a string representation of a list/tuple into a list of floats."""
-    try:
-        xs = literal_eval(value) if isinstance(value, str) else value
-        if isinstance(xs, (list, tuple)):
-            out = []
-            for x in xs:
-                if x is None:
-                    out.append(None)
-                else:
-                    try:
-                        out.append(float(x))
-                    except Exception:
-                        out.append(None)
-            return out
-    except Exception:
-        return []
-    return []
-
-
-def load_dataframe(csv_path: Path) -> "pd.DataFrame":
-    """Load and validate CSV file."""
+    usecols/dtype are handed to the C parser so unused columns are skipped at
+    read time and numeric columns are converted inline instead of as a
+    post-hoc coercion pass. usecols is applied as a membership callable so a
+    missing optional column does not raise.
+    """
     if not csv_path.exists():
         raise FileNotFoundError(f"Input CSV not found: {csv_path}")
-    
-    if pd is None:
-        raise ImportError("Pandas is required. Install pandas and retry.")
-    
-    return pd.read_csv(csv_path)
+
+    return load_correlated(
+        str(csv_path),
+        frozenset(usecols) if usecols is not None else None,
+        tuple(sorted(dtype.items())) if dtype is not None else None,
+    )
+
+
+def parse_ci_column(raw: "pd.Series"):
+    """
+    Vectorized parse of a string-encoded int-list column into a flat values
+    array plus per-row lengths (CSR layout), entirely in pandas/NumPy C code:
+    strip brackets, split on ',', explode, and one pd.to_numeric over all
+    tokens. Non-numeric tokens (None/null/empty) are dropped per row, same as
+    parse_list_of_ints.
+    """
+    s = raw.fillna("").astype(str).str.strip().str.strip("[]()")
+    exploded = s.str.split(",").explode()
+    vals = pd.to_numeric(exploded.str.strip(), errors="coerce")
+    valid = vals.notna()
+    lengths = (
+        valid.groupby(level=0).sum().reindex(raw.index, fill_value=0).to_numpy(np.int64)
+    )
+    kept = vals[valid].to_numpy(np.float64)
+    # CI is gCO2eq/kWh (well under 32767), so int16 halves the bandwidth of
+    # the downstream reductions; widen if a value ever exceeds the range.
+    dtype = np.int16 if (kept.size == 0 or np.abs(kept).max() < 32767) else np.int32
+    return kept.astype(dtype), lengths
+
+
+def min_reduceat(values: "np.ndarray", lengths: "np.ndarray") -> "pd.arrays.IntegerArray":
+    """
+    Per-row min over a flat CSR buffer with a single np.minimum.reduceat call
+    instead of Python min() once per row. Empty rows come back as NA.
+    """
+    n = lengths.shape[0]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    nonempty = lengths > 0
+    data = np.zeros(n, dtype=values.dtype)
+    if values.size:
+        # Empty rows contribute no values, so consecutive non-empty starts
+        # still delimit the right slices for reduceat.
+        data[nonempty] = np.minimum.reduceat(values, offsets[:-1][nonempty])
+    return pd.arrays.IntegerArray(data, mask=~nonempty)
+
+
+def per_row_min_ci_jit(raw: "pd.Series") -> "pd.arrays.IntegerArray":
+    """
+    Numba path for best_ci: concatenate the raw ci_list strings into one byte
+    buffer with per-row offsets and parse + min in a single jitted pass,
+    skipping the Python-level list parse entirely.
+    """
+    encoded = raw.fillna("").astype(str)
+    lengths = encoded.str.len().to_numpy(np.int64)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    buf = np.frombuffer(
+        "".join(encoded.tolist()).encode("ascii", "replace"), dtype=np.uint8
+    )
+    mins, has_value = _parse_and_min(buf, starts, ends)
+    return pd.arrays.IntegerArray(mins.astype(np.int32), mask=~has_value)
 
 
 def compute_ci_aggregates(df: "pd.DataFrame") -> tuple:
     """
     Compute CI aggregates: selected vs best-case.
-    Returns: (df_ci, ci_list_parsed, sum_selected, sum_best, abs_savings, pct_savings)
+    Returns: (df_ci, sum_selected, sum_best, abs_savings, pct_savings)
     """
-    # Parse CI lists
-    ci_list_parsed = None
+    # Per-row Python parsing is gone from this path entirely: the jit kernel
+    # mins over the raw strings, and the fallback parses the whole column
+    # with vectorized string ops before one reduceat.
+
+    # Filter and compute best CI per row. No df.copy(): coerce into a
+    # standalone Series and take a .loc slice, so we never duplicate the
+    # whole DataFrame just to mask a few rows.
+    selected = pd.to_numeric(df["selected_ip_ci"], errors="coerce")
+    mask = selected >= 0
+    df_ci = df.loc[mask]
+
     if "ci_list" in df.columns:
-        ci_list_parsed = df["ci_list"].apply(parse_list_of_ints)
-    
-    # Filter and compute best CI per row
-    df_ci = df.copy()
-    df_ci["selected_ip_ci"] = pd.to_numeric(df_ci["selected_ip_ci"], errors="coerce")
-    df_ci = df_ci[df_ci["selected_ip_ci"] >= 0]
-    
-    if ci_list_parsed is not None:
-        df_ci = df_ci.assign(best_ci=ci_list_parsed.apply(lambda xs: min(xs) if xs else None))
+        if numba is not None:
+            best = per_row_min_ci_jit(df["ci_list"].loc[df_ci.index])
+        else:
+            best = min_reduceat(*parse_ci_column(df["ci_list"].loc[df_ci.index]))
+        df_ci = df_ci.assign(best_ci=best)
     else:
         df_ci = df_ci.assign(best_ci=None)
     
-    sum_selected = df_ci["selected_ip_ci"].sum()
+    sum_selected = selected[mask].sum()
     sum_best = df_ci["best_ci"].fillna(0).sum()
     abs_savings = sum_selected - sum_best
     pct_savings = (abs_savings / sum_selected * 100) if sum_selected > 0 else 0
     
-    return df_ci, ci_list_parsed, sum_selected, sum_best, abs_savings, pct_savings
+    return df_ci, sum_selected, sum_best, abs_savings, pct_savings
 
 
-def compute_hourly_min_ci(df_ci: "pd.DataFrame", ci_list_parsed: "pd.Series") -> dict:
+def compute_hourly_min_ci(df_ci: "pd.DataFrame", row_ts: "Optional[np.ndarray]") -> dict:
     """
     Compute per-hour minimum CI from all ci_list entries in each hour.
+
+    Fully vectorized: the ci_list column goes through the exploded string
+    parse (parse_ci_column) into a flat values/lengths pair, each value is
+    tagged with its row's hour via np.repeat, and one np.minimum.at
+    scatter-reduction produces all the hour minima. No Python lists are
+    materialized anywhere on this path. row_ts is the timestamp column
+    already coerced to float64 (None when the column is absent), shared with
+    compute_hourly_savings so the coercion happens once.
     Returns: dict mapping hour -> min CI value
     """
-    per_hour_min_ci = {}
-    
-    if ci_list_parsed is None or "timestamp" not in df_ci.columns:
-        return per_hour_min_ci
-    
-    # Build DataFrame with timestamp and ci_list
-    df_hour = df_ci[["timestamp"]].copy()
-    df_hour["ci_list"] = ci_list_parsed.loc[df_ci.index].reset_index(drop=True)
-    
-    # Extract hour from timestamp (assumes UNIX epoch seconds)
-    df_hour["hour"] = df_hour["timestamp"].apply(
-        lambda ts: int(ts) // 3600 if not pd.isna(ts) else math.nan
-    )
-    
-    # Build hour -> min CI mapping
-    for hour, group in df_hour.groupby("hour"):
-        flattened = [
-            ci for subl in group["ci_list"] 
-            if isinstance(subl, list) 
-            for ci in subl
-        ]
-        if flattened:
-            per_hour_min_ci[hour] = min(flattened)
-    
-    return per_hour_min_ci
+    if row_ts is None or "ci_list" not in df_ci.columns:
+        return {}
+
+    values, lengths = parse_ci_column(df_ci["ci_list"])
+    valid = ~np.isnan(row_ts)
+    row_hour = np.zeros(len(row_ts), dtype=np.int64)
+    row_hour[valid] = row_ts[valid].astype(np.int64) // 3600
+
+    if not valid.all():
+        values = values[np.repeat(valid, lengths)]
+        lengths = np.where(valid, lengths, 0)
+    if values.size == 0:
+        return {}
+
+    value_hour = np.repeat(row_hour, lengths)
+    unique_hours, hour_index = np.unique(value_hour, return_inverse=True)
+    per_hour_min = np.full(unique_hours.size, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(per_hour_min, hour_index, values)
+    return {int(h): int(m) for h, m in zip(unique_hours, per_hour_min)}
 
 
 def compute_hourly_savings(
-    df_ci: "pd.DataFrame",
+    row_ts: "Optional[np.ndarray]",
     per_hour_min_ci: dict,
     sum_selected: float,
     sum_best: float,
 ) -> Optional[tuple]:
     """
-    Compute hourly minimum CI savings.
-    Returns: (sum_per_hour_min, abs_savings_hour, pct_savings_hour, 
+    Compute hourly minimum CI savings. row_ts is the shared pre-coerced
+    float64 timestamp array (None when the column is absent).
+    Returns: (sum_per_hour_min, abs_savings_hour, pct_savings_hour,
               abs_savings_best_vs_hr, pct_savings_best_vs_hr) or None if no data
     """
-    if "timestamp" not in df_ci.columns:
+    if row_ts is None or not per_hour_min_ci:
         return None
-    
-    per_row_hour_min = []
-    for ts in df_ci["timestamp"]:
-        hour = int(ts) // 3600 if not pd.isna(ts) else None
-        per_row_hour_min.append(per_hour_min_ci.get(hour) if hour in per_hour_min_ci else None)
-    
-    valid_per_row_hour_min = [ci for ci in per_row_hour_min if ci is not None]
-    if not valid_per_row_hour_min:
+
+    # Hour binning is one vectorized divide over the pre-coerced array, and
+    # the hour->min resolution is a single hashed gather (Series.map over the
+    # dict) in pandas C code instead of two dict probes per row; rows without
+    # a timestamp or without an hour minimum fall out as NA.
+    hours = pd.Series(row_ts // 3600).astype("Int64")
+    mapped = hours.map(per_hour_min_ci)
+    if mapped.notna().sum() == 0:
         return None
-    
-    sum_per_hour_min = sum(valid_per_row_hour_min)
+
+    sum_per_hour_min = float(mapped.sum())
     abs_savings_hour = sum_selected - sum_per_hour_min
     pct_savings_hour = (abs_savings_hour / sum_selected * 100) if sum_selected > 0 else 0
     abs_savings_best_vs_hr = sum_best - sum_per_hour_min
@@ -184,17 +454,222 @@ def compute_hourly_savings(
             abs_savings_best_vs_hr, pct_savings_best_vs_hr)
 
 
-def find_best_ci_index(ci_list: List[Optional[int]]) -> Optional[int]:
-    """Find the index of the minimum CI value in a list."""
-    best_val = None
-    best_idx = None
-    for i, v in enumerate(ci_list):
-        if v is None:
-            continue
-        if best_val is None or v < best_val:
-            best_val = v
-            best_idx = i
-    return best_idx
+def best_rtt_per_row(ci_lists: list, rtt_lists: list) -> "np.ndarray":
+    """
+    Flatten the parallel ragged ci/rtt lists into CSR arrays (int32 CI values,
+    float32 RTTs aligned index-for-index, NaN where missing) and compute the
+    RTT at each row's min-CI position with the jitted kernel. ci_lists may
+    contain None placeholders (parse_list_of_optional_ints keeps them so the
+    indices stay aligned with rtt_list); they are stored as the dtype max so
+    they never win the min, and their RTT slot stays NaN.
+    """
+    n = len(ci_lists)
+    lengths = np.fromiter((len(xs) for xs in ci_lists), dtype=np.int64, count=n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    total = int(offsets[-1])
+
+    def fill(ci_dtype):
+        sentinel = np.iinfo(ci_dtype).max
+        ci = np.empty(total, dtype=ci_dtype)
+        rtt = np.full(total, np.nan, dtype=np.float32)
+        pos = 0
+        for cis, rtts in zip(ci_lists, rtt_lists):
+            has_rtts = isinstance(rtts, list)
+            for j, v in enumerate(cis):
+                if v is None:
+                    ci[pos] = sentinel
+                else:
+                    ci[pos] = v
+                    if has_rtts and j < len(rtts) and rtts[j] is not None:
+                        rtt[pos] = rtts[j]
+                pos += 1
+        return ci, rtt
+
+    # int16 CI / float32 RTT keep the flat buffers narrow (CI fits easily in
+    # gCO2eq/kWh range); widen only if a value overflows.
+    try:
+        ci_flat, rtt_flat = fill(np.int16)
+    except OverflowError:
+        ci_flat, rtt_flat = fill(np.int32)
+    return _best_rtt_at_min_ci(ci_flat, rtt_flat, offsets)
+
+
+def best_rtt_dense(ci_lists: list, rtt_lists: list) -> "np.ndarray":
+    """
+    NumPy fallback for best_rtt_per_row: pad the ragged ci/rtt lists into two
+    dense 2D arrays (int64 max / NaN for missing), take one argmin(axis=1)
+    over the CI matrix, and gather the RTTs with a single fancy index —
+    replacing the per-row Python min scan. None placeholders inside a ci_list
+    become the same int64-max pad, so they never beat a real value and rows
+    with no real CI at all come back NaN.
+    """
+    n = len(ci_lists)
+    out = np.full(n, np.nan, dtype=np.float64)
+    max_len = max((len(xs) for xs in ci_lists), default=0)
+    if n == 0 or max_len == 0:
+        return out
+
+    sentinel = np.iinfo(np.int64).max
+    cis = np.full((n, max_len), sentinel, dtype=np.int64)
+    rtts = np.full((n, max_len), np.nan, dtype=np.float64)
+    for i, xs in enumerate(ci_lists):
+        if xs:
+            cis[i, : len(xs)] = [sentinel if v is None else v for v in xs]
+    for i, rs in enumerate(rtt_lists):
+        if isinstance(rs, list) and rs:
+            rs = rs[:max_len]
+            rtts[i, : len(rs)] = [np.nan if v is None else v for v in rs]
+
+    best_indices = cis.argmin(axis=1)
+    out = rtts[np.arange(n), best_indices]
+    out[cis[np.arange(n), best_indices] == sentinel] = np.nan
+    return out
+
+
+def _print_stream_report(
+    total_rows: int,
+    rows_considered: int,
+    sum_selected: float,
+    sum_best: float,
+    sum_per_hour_min: float,
+) -> None:
+    print("Carbon intensity aggregation (selected vs best-case) [streaming]")
+    print(f"Rows considered: {rows_considered} (of {total_rows})")
+    abs_savings = sum_selected - sum_best
+    pct_savings = (abs_savings / sum_selected * 100) if sum_selected > 0 else 0
+    print(f"Percent savings: {pct_savings:.2f}%")
+    print(
+        f"Average selected CI per row: {sum_selected/max(rows_considered,1):.2f}\n"
+        f"Average best-case CI per row: {sum_best/max(rows_considered,1):.2f}"
+    )
+    if sum_per_hour_min:
+        abs_savings_hour = sum_selected - sum_per_hour_min
+        pct_savings_hour = (abs_savings_hour / sum_selected * 100) if sum_selected > 0 else 0
+        abs_savings_best_vs_hr = sum_best - sum_per_hour_min
+        pct_savings_best_vs_hr = (abs_savings_best_vs_hr / sum_best * 100) if sum_best > 0 else 0
+        print("\nHourly minimum CI saving (for each row, use min CI among all ci_list in same hour):")
+        print(f"Percent savings vs selected: {pct_savings_hour:.2f}%")
+        print(f"Percent savings vs best-case: {pct_savings_best_vs_hr:.2f}%")
+        print(f"Average per-hour best-case CI per row: {(sum_per_hour_min/max(rows_considered,1)):.2f}")
+    else:
+        print("\n[Hourly minimum CI saving]: Not enough data to compute (no timestamp or ci_list found)")
+
+
+def _report_streaming_jit(csv_path: Path) -> Optional[int]:
+    """
+    Numba fast path for report_streaming: read the file once and hand the raw
+    bytes to the jitted one-pass scanner. Returns None when the header lacks
+    the columns the kernel needs, so the caller can fall back.
+    """
+    data = np.frombuffer(csv_path.read_bytes(), dtype=np.uint8)
+    newlines = np.flatnonzero(data == 10)
+    if newlines.size == 0:
+        _print_stream_report(0, 0, 0.0, 0.0, 0.0)
+        return 0
+    header = bytes(data[: newlines[0]]).decode("utf-8", "replace").strip("\r\n")
+    cols = header.split(",")
+    if "selected_ip_ci" not in cols:
+        return None
+    sel_col = cols.index("selected_ip_ci")
+    ci_col = cols.index("ci_list") if "ci_list" in cols else -1
+    ts_col = cols.index("timestamp") if "timestamp" in cols else -1
+
+    body = data[newlines[0] + 1 :]
+    max_rows = int(np.count_nonzero(body == 10)) + 1
+    sel, row_min, has_min, hour, total_rows = _stream_aggregate(
+        body, sel_col, ci_col, ts_col, max_rows
+    )
+    sel = sel[:total_rows]
+    row_min = row_min[:total_rows]
+    has_min = has_min[:total_rows]
+    hour = hour[:total_rows]
+
+    used = sel >= 0  # NaN compares false, matching the coerce+filter semantics
+    rows_considered = int(used.sum())
+    sum_selected = float(sel[used].sum())
+    sum_best = float(row_min[used & has_min].sum())
+
+    sum_per_hour_min = 0.0
+    houred = used & (hour >= 0)
+    if houred.any():
+        unique_hours, counts = np.unique(hour[houred], return_counts=True)
+        minned = houred & has_min
+        sentinel = np.iinfo(np.int64).max
+        per_hour = np.full(unique_hours.size, sentinel, dtype=np.int64)
+        if minned.any():
+            idx = np.searchsorted(unique_hours, hour[minned])
+            np.minimum.at(per_hour, idx, row_min[minned])
+        have = per_hour != sentinel
+        sum_per_hour_min = float((counts[have] * per_hour[have]).sum())
+
+    _print_stream_report(total_rows, rows_considered, sum_selected, sum_best, sum_per_hour_min)
+    return 0
+
+
+def report_streaming(csv_path: Path) -> int:
+    """
+    One-pass streaming version of the CI aggregation: iterate csv.DictReader
+    and keep scalar accumulators plus per-hour minima, instead of loading the
+    whole CSV into a DataFrame. Prints the same report as the pandas path.
+    When numba is available the whole pass runs as a jitted scan over the raw
+    file bytes.
+    Returns: 0 on success, 1 on error
+    """
+    if not csv_path.exists():
+        print(f"Input CSV not found: {csv_path}", file=sys.stderr)
+        return 1
+
+    if numba is not None and np is not None:
+        result = _report_streaming_jit(csv_path)
+        if result is not None:
+            return result
+
+    total_rows = 0
+    rows_considered = 0
+    sum_selected = 0.0
+    sum_best = 0.0
+    per_hour_min_ci: Dict[int, int] = {}
+    hour_counts: Dict[int, int] = {}
+
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            total_rows += 1
+            try:
+                selected = float(row.get("selected_ip_ci") or "")
+            except ValueError:
+                continue
+            if not (selected >= 0):
+                continue
+            rows_considered += 1
+            sum_selected += selected
+
+            cis = parse_list_of_ints(row.get("ci_list") or "")
+            row_min = min(cis) if cis else None
+            if row_min is not None:
+                sum_best += row_min
+
+            ts = row.get("timestamp")
+            if ts:
+                try:
+                    hour = int(float(ts)) // 3600
+                except ValueError:
+                    continue
+                hour_counts[hour] = hour_counts.get(hour, 0) + 1
+                if row_min is not None:
+                    cur = per_hour_min_ci.get(hour)
+                    if cur is None or row_min < cur:
+                        per_hour_min_ci[hour] = row_min
+
+    # Hourly minimum savings: each row in an hour counts that hour's min once,
+    # so sum = count(hour) * min(hour) without keeping per-row state.
+    sum_per_hour_min = sum(
+        count * per_hour_min_ci[hour]
+        for hour, count in hour_counts.items()
+        if hour in per_hour_min_ci
+    )
+    _print_stream_report(total_rows, rows_considered, sum_selected, sum_best, sum_per_hour_min)
+    return 0
 
 
 def compare_rtt_latency(rtt_csv_path: Path) -> int:
@@ -203,7 +678,11 @@ def compare_rtt_latency(rtt_csv_path: Path) -> int:
     Returns: 0 on success, 1 on error
     """
     try:
-        df_rtt = load_dataframe(rtt_csv_path)
+        df_rtt = load_dataframe(
+            rtt_csv_path,
+            usecols={"avg_rtt", "ci_list", "rtt_list"},
+            dtype={"avg_rtt": "float32"},
+        )
     except (FileNotFoundError, ImportError) as e:
         print(f"Error loading RTT CSV: {e}", file=sys.stderr)
         return 1
@@ -215,38 +694,43 @@ def compare_rtt_latency(rtt_csv_path: Path) -> int:
         print(f"RTT CSV missing columns: {missing}", file=sys.stderr)
         return 1
     
-    # Parse lists
-    ci_lists = df_rtt["ci_list"].apply(parse_list_of_ints)
+    # Parse lists. ci_list keeps None placeholders so the min-CI index is
+    # taken over the same positions rtt_list has — dropping nulls here would
+    # shift the alignment and gather the wrong RTT.
+    ci_lists = df_rtt["ci_list"].apply(parse_list_of_optional_ints)
     rtt_lists = df_rtt["rtt_list"].apply(parse_list_of_floats)
     
     # Find best CI index per row and get corresponding RTT
-    best_indices = [find_best_ci_index(xs) for xs in ci_lists]
-    df_rtt["best_rtt"] = [
-        (r[int(i)] if (i is not None and not pd.isna(i) and isinstance(r, list) 
-                       and int(i) < len(r)) else None)
-        for r, i in zip(rtt_lists, best_indices)
-    ]
-    
-    # Filter to rows with valid RTT data
-    df_rtt["avg_rtt"] = pd.to_numeric(df_rtt["avg_rtt"], errors="coerce")
-    df_latency = df_rtt[df_rtt["best_rtt"].notna() & df_rtt["avg_rtt"].notna()].copy()
+    if numba is not None:
+        df_rtt["best_rtt"] = best_rtt_per_row(ci_lists.tolist(), rtt_lists.tolist())
+    else:
+        df_rtt["best_rtt"] = best_rtt_dense(ci_lists.tolist(), rtt_lists.tolist())
     
-    if len(df_latency) == 0:
+    # Filter to rows with valid RTT data. Two float64 arrays and a boolean
+    # mask are all the stats need; no full-width DataFrame copy, and best_rtt
+    # is coerced exactly once.
+    sel = pd.to_numeric(df_rtt["avg_rtt"], errors="coerce").to_numpy(dtype=np.float64)
+    best = pd.to_numeric(df_rtt["best_rtt"], errors="coerce").to_numpy(dtype=np.float64)
+    mask = np.isfinite(sel) & np.isfinite(best)
+    sel = sel[mask]
+    best = best[mask]
+
+    if sel.size == 0:
         print("\n[RTT] No usable rows for latency comparison.")
         return 0
-    
+
     # Compute statistics
-    mean_selected = float(df_latency["avg_rtt"].mean())
-    mean_best = float(pd.to_numeric(df_latency["best_rtt"], errors="coerce").mean())
-    median_selected = float(df_latency["avg_rtt"].median())
-    median_best = float(pd.to_numeric(df_latency["best_rtt"], errors="coerce").median())
-    
+    mean_selected = float(sel.mean())
+    mean_best = float(best.mean())
+    median_selected = float(np.median(sel))
+    median_best = float(np.median(best))
+
     pct_mean_change = ((mean_best - mean_selected) / mean_selected * 100.0) if mean_selected > 0 else 0.0
     pct_median_change = ((median_best - median_selected) / median_selected * 100.0) if median_selected > 0 else 0.0
     
     # Print results
     print("\nRTT comparison (selected avg_rtt vs RTT at per-row min CI):")
-    print(f"Rows considered for RTT: {len(df_latency)}")
+    print(f"Rows considered for RTT: {sel.size}")
     print(f"Mean selected RTT: {mean_selected:.3f} ms")
     print(f"Mean RTT at min CI: {mean_best:.3f} ms")
     print(f"Percent change in mean RTT: {pct_mean_change:.2f}%")
@@ -260,16 +744,28 @@ def compare_rtt_latency(rtt_csv_path: Path) -> int:
 def main() -> int:
     """Main entry point for CI statistics computation."""
     args = parse_args()
-    
+
+    if args.stream:
+        result = report_streaming(Path(args.csv))
+        if result != 0:
+            return result
+        if args.rtt:
+            return compare_rtt_latency(Path(args.rtt_csv))
+        return 0
+
     # Load main CSV
     try:
-        df = load_dataframe(Path(args.csv))
+        df = load_dataframe(
+            Path(args.csv),
+            usecols={"selected_ip_ci", "ci_list", "timestamp"},
+            dtype={"selected_ip_ci": "float32"},
+        )
     except (FileNotFoundError, ImportError) as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
     
     # Compute CI aggregates
-    df_ci, ci_list_parsed, sum_selected, sum_best, abs_savings, pct_savings = compute_ci_aggregates(df)
+    df_ci, sum_selected, sum_best, abs_savings, pct_savings = compute_ci_aggregates(df)
     
     # Print CI aggregation results
     print("Carbon intensity aggregation (selected vs best-case) [pandas]")
@@ -280,9 +776,16 @@ def main() -> int:
         f"Average best-case CI per row: {sum_best/max(len(df_ci),1):.2f}"
     )
     
-    # Compute hourly minimum CI savings
-    per_hour_min_ci = compute_hourly_min_ci(df_ci, ci_list_parsed)
-    hourly_savings = compute_hourly_savings(df_ci, per_hour_min_ci, sum_selected, sum_best)
+    # Compute hourly minimum CI savings (vectorized exploded parse; no lazy
+    # Python list pass needed anymore). The timestamp coercion is hoisted so
+    # both hourly functions share one float64 array.
+    row_ts = (
+        pd.to_numeric(df_ci["timestamp"], errors="coerce").to_numpy(dtype=np.float64)
+        if "timestamp" in df_ci.columns
+        else None
+    )
+    per_hour_min_ci = compute_hourly_min_ci(df_ci, row_ts)
+    hourly_savings = compute_hourly_savings(row_ts, per_hour_min_ci, sum_selected, sum_best)
     
     if hourly_savings:
         sum_per_hour_min, abs_savings_hour, pct_savings_hour, abs_savings_best_vs_hr, pct_savings_best_vs_hr = hourly_savings
@@ -1,37 +1,192 @@
+import bisect
 import json
+import atexit
 import csv
-import sys
 import os
+import pickle
+import shelve
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from ip2ci import ip_to_loc, loc_to_ci, load_cache, save_cache
+from ip2ci import ip_to_loc, loc_to_ci
 
 # Local import
-from dns import extract_probe_resolved_ips
+from dns import iter_probe_resolved_ips
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    np = None
+
+try:
+    import numba  # type: ignore
+except ImportError:
+    numba = None
+
+
+if numba is not None:
+
+    @numba.njit("i8(i8, i8)", cache=True)
+    def _prefix_len_int(a, b):  # pragma: no cover - requires numba
+        """
+        Decimal common-prefix length of two positive ints via //10 digit
+        arithmetic - no string allocation per comparison.
+        """
+        la = 1
+        t = a
+        while t >= 10:
+            t //= 10
+            la += 1
+        lb = 1
+        t = b
+        while t >= 10:
+            t //= 10
+            lb += 1
+        # Align to the shorter number; zip() over the strings stops there too.
+        while la > lb:
+            a //= 10
+            la -= 1
+        while lb > la:
+            b //= 10
+            lb -= 1
+        p = 10 ** (la - 1)
+        cnt = 0
+        while p > 0:
+            if (a // p) % 10 != (b // p) % 10:
+                break
+            cnt += 1
+            p //= 10
+        return cnt
+
+    @numba.njit("i8(i8[:], i8)", cache=True)
+    def _select_best_idx(ts_arr, target):  # pragma: no cover - requires numba
+        """
+        Jitted neighbor selection: searchsorted plus the three-tier tiebreak
+        (prefix desc, abs diff asc, latest t) over the two bracketing entries.
+        """
+        n = ts_arr.shape[0]
+        if n == 0:
+            return -1
+        idx = np.searchsorted(ts_arr, target)
+        best_i = -1
+        best_prefix = -1
+        best_diff = -1
+        for i in range(idx - 1, idx + 1):
+            if i < 0 or i >= n:
+                continue
+            pl = _prefix_len_int(ts_arr[i], target)
+            diff = ts_arr[i] - target
+            if diff < 0:
+                diff = -diff
+            if pl > best_prefix or (pl == best_prefix and diff <= best_diff):
+                best_prefix = pl
+                best_diff = diff
+                best_i = i
+        return best_i
 
 # Constants
 IPGEO_TOKEN = "052fb585189d4d6fb728f2cabb73a255"
 EM_TOKEN = "ptTcw6cZ9zS07WgBYgXP"
-CACHE_FILE = "./output/ip2ci_cache.json"
-DNS_CACHE_FILE = "./output/dns_extract_cache.json"
+IP2LOC_CACHE_FILE = "./output/ip2loc_cache"
+LOC2CI_CACHE_FILE = "./output/loc2ci_cache"
+DNS_CACHE_FILE = "./output/dns_extract_cache.pkl"
+
+# Shelve-backed caches: each assignment persists that one key, so there is no
+# hold-everything-in-RAM dict and no serialize-the-world rewrite at exit. The
+# lock serializes dbm access from the resolver thread pool.
+os.makedirs("./output", exist_ok=True)
+ip2loc_cache = shelve.open(IP2LOC_CACHE_FILE)
+loc2ci_cache = shelve.open(LOC2CI_CACHE_FILE)
+_cache_lock = threading.Lock()
+atexit.register(ip2loc_cache.close)
+atexit.register(loc2ci_cache.close)
+
+
+_PARALLEL_INDEX_MIN_PROBES = 64
+
+
+def _index_probe_entry(
+    item: Tuple[int, Dict[int, set]],
+) -> Tuple[int, List[int], List[str], List[Tuple[frozenset, tuple]]]:
+    """Build one probe's sorted index entry (process-pool worker)."""
+    prb_id, by_ts = item
+    ts_list = sorted(by_ts)
+    return (
+        prb_id,
+        ts_list,
+        [str(t) for t in ts_list],
+        [(frozenset(by_ts[t]), tuple(sorted(by_ts[t]))) for t in ts_list],
+    )
+
+
+def build_dns_index(
+    dns_results: Any,
+) -> Dict[int, Tuple[List[int], List[str], List[Tuple[frozenset, tuple]], Any]]:
+    """
+    Build an index per probe: parallel lists (timestamps, timestamp strings,
+    resolved-IP entries) sorted by timestamp, plus an int64 array of the
+    timestamps for the jitted lookup when numba is available. Timestamps are
+    kept as a separate sorted list so lookups can bisect, and their decimal
+    strings are precomputed once here instead of per comparison. Each
+    resolved-IP entry is a (frozenset, sorted tuple) pair built once here, so
+    membership tests and the CSV's sorted listing never re-sort per ping row.
+
+    dns_results is an iterable of (prb_id, ts, resolved_ips) triples as
+    streamed by iter_probe_resolved_ips; the legacy dict-of-dicts from
+    extract_probe_resolved_ips is accepted too and unpacked lazily.
+    """
+    if isinstance(dns_results, dict):
+        dns_results = (
+            (prb_id, ts, meas.get("resolved_ips", []))
+            for prb_id, data in dns_results.items()
+            for ts, meas in data["measurements"].items()
+        )
+
+    merged: Dict[int, Dict[int, set]] = {}
+    for prb_id, ts, ips in dns_results:
+        merged.setdefault(int(prb_id), {}).setdefault(int(ts), set()).update(ips)
+
+    # Probes are independent, so the per-probe sort/tuple construction fans
+    # out over a process pool once there are enough of them to amortize the
+    # worker spawn + pickling cost; small inputs stay serial.
+    items = list(merged.items())
+    if len(items) >= _PARALLEL_INDEX_MIN_PROBES:
+        with ProcessPoolExecutor() as pool:
+            built = list(pool.map(_index_probe_entry, items, chunksize=16))
+    else:
+        built = [_index_probe_entry(item) for item in items]
+
+    probe_to_measurements: Dict[int, Tuple[List[int], List[str], List[Tuple[frozenset, tuple]], Any]] = {}
+    for prb_id, ts_list, ts_strs, ip_entries in built:
+        probe_to_measurements[prb_id] = (
+            ts_list,
+            ts_strs,
+            ip_entries,
+            np.asarray(ts_list, dtype=np.int64) if numba is not None else None,
+        )
+    return probe_to_measurements
 
-# Load caches
-ip2loc_cache, loc2ci_cache = load_cache(CACHE_FILE)
 
+_readable_time_cache: Dict[int, str] = {}
 
-def build_dns_index(dns_results: Dict[int, Dict[str, Any]]) -> Dict[int, List[Tuple[int, set]]]:
+
+def _readable_time(ts: int) -> str:
     """
-    Build an index per probe: list of (timestamp, set(resolved_ips)) sorted by timestamp.
+    Memoized datetime.fromtimestamp(...).isoformat(): ping timestamps repeat
+    across probes (and across the two passes), so each unique second is
+    formatted once instead of allocating a datetime per row.
     """
-    probe_to_measurements: Dict[int, List[Tuple[int, set]]] = {}
-    for prb_id, data in dns_results.items():
-        time_points: List[Tuple[int, set]] = []
-        for ts, meas in data["measurements"].items():
-            resolved = set(meas.get("resolved_ips", []))
-            time_points.append((int(ts), resolved))
-        time_points.sort(key=lambda x: x[0])
-        probe_to_measurements[int(prb_id)] = time_points
-    return probe_to_measurements
+    s = _readable_time_cache.get(ts)
+    if s is None:
+        s = datetime.fromtimestamp(ts).isoformat()
+        _readable_time_cache[ts] = s
+    return s
 
 
 def _file_fingerprint(path: str) -> str:
@@ -50,11 +205,14 @@ def _file_fingerprint(path: str) -> str:
 
 
 def _dns_cache_load(cache_path: str) -> Dict[str, Any]:
+    # Pickle instead of JSON: a large dns_results blob loads in one binary
+    # pass with no per-key parsing, and int probe ids round-trip without the
+    # str conversion JSON forces.
     try:
         if not os.path.exists(cache_path):
             return {}
-        with open(cache_path, "r", encoding="utf-8") as f:
-            blob = json.load(f)
+        with open(cache_path, "rb") as f:
+            blob = pickle.load(f)
         return blob if isinstance(blob, dict) else {}
     except Exception:
         return {}
@@ -63,14 +221,17 @@ def _dns_cache_load(cache_path: str) -> Dict[str, Any]:
 def _dns_cache_save(cache_path: str, cache_obj: Dict[str, Any]) -> None:
     os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
     tmp = f"{cache_path}.tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(cache_obj, f, ensure_ascii=False)
+    with open(tmp, "wb") as f:
+        pickle.dump(cache_obj, f, protocol=5)
     os.replace(tmp, cache_path)
 
 
-def _common_prefix_length(a: int, b: int) -> int:
-    sa = str(int(a))
-    sb = str(int(b))
+def _csv_quote(s: str) -> str:
+    """Quote one CSV field by hand (internal quotes doubled)."""
+    return '"' + s.replace('"', '""') + '"'
+
+
+def _common_prefix_length(sa: str, sb: str) -> int:
     i = 0
     for ca, cb in zip(sa, sb):
         if ca != cb:
@@ -79,99 +240,178 @@ def _common_prefix_length(a: int, b: int) -> int:
     return i
 
 
-def find_latest_resolved_set(time_points: List[Tuple[int, set]], ts: int) -> set:
+_POW10 = tuple(10 ** i for i in range(11))
+_EPOCH_LO = 1_000_000_000  # this dataset's timestamps are 10-digit epoch seconds
+_EPOCH_HI = 10_000_000_000
+
+
+def _prefix_len_epoch(a: int, b: int) -> int:
     """
-    From list of (timestamp, ips), select the entry whose timestamp has the
-    longest decimal common prefix with ts. If ties occur, pick the one with the
-    smallest absolute time difference; if still tied, pick the greatest t.
-    Return its IP set, or empty if list is empty.
+    Decimal common-prefix length specialized for two 10-digit ints: binary
+    search the smallest k with a//10**k == b//10**k (equality is monotone in
+    k), so no per-comparison string conversion or digit walk.
     """
-    if not time_points:
-        return set()
+    lo, hi = 0, 10
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a // _POW10[mid] == b // _POW10[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return 10 - lo
+
+
+_EMPTY_ENTRY: Tuple[frozenset, tuple] = (frozenset(), ())
+
 
-    best_ips = set()
+def find_latest_resolved_set(
+    time_index: Optional[Tuple[List[int], List[str], List[Tuple[frozenset, tuple]], Any]],
+    ts: int,
+) -> Tuple[frozenset, tuple]:
+    """
+    Select the entry whose timestamp has the longest decimal common prefix
+    with ts. If ties occur, pick the one with the smallest absolute time
+    difference; if still tied, pick the greatest t. Return its
+    (frozenset, sorted tuple) IP entry, or empty if the index is empty.
+
+    Shared-prefix groups are contiguous in sorted order, so only the two
+    neighbors of ts can win under these rules; a bisect replaces the former
+    O(M) scan over every measurement.
+    """
+    if not time_index or not time_index[0]:
+        return _EMPTY_ENTRY
+    ts_list, ts_strs, ip_entries, ts_arr = time_index
+
+    ts = int(ts)
+    if numba is not None and ts_arr is not None:
+        best_i = _select_best_idx(ts_arr, ts)
+        return ip_entries[best_i] if best_i >= 0 else _EMPTY_ENTRY
+
+    sts = str(ts)
+    ts_is_epoch = _EPOCH_LO <= ts < _EPOCH_HI
+    idx = bisect.bisect_left(ts_list, ts)
+
+    best_i = -1
     best_prefix = -1
     best_time_diff = None
-    best_t = None
-
-    for t, ips in time_points:
-        prefix_len = _common_prefix_length(t, ts)
-        time_diff = abs(int(t) - int(ts))
-
-        select = False
-        if prefix_len > best_prefix:
-            select = True
-        elif prefix_len == best_prefix:
-            if best_time_diff is None or time_diff < best_time_diff:
-                select = True
-            elif time_diff == best_time_diff and (best_t is None or t > best_t):
-                select = True
-
-        if select:
+    # Evaluate in ascending-t order so the "greatest t" tiebreak falls out of
+    # the strict comparisons, exactly as the full scan behaved.
+    for i in (idx - 1, idx):
+        if not (0 <= i < len(ts_list)):
+            continue
+        t = ts_list[i]
+        if ts_is_epoch and _EPOCH_LO <= t < _EPOCH_HI:
+            prefix_len = _prefix_len_epoch(t, ts)
+        else:
+            prefix_len = _common_prefix_length(ts_strs[i], sts)
+        time_diff = abs(ts_list[i] - ts)
+        if (
+            prefix_len > best_prefix
+            or (prefix_len == best_prefix
+                and (best_time_diff is None or time_diff <= best_time_diff))
+        ):
             best_prefix = prefix_len
             best_time_diff = time_diff
-            best_t = t
-            best_ips = ips
-
-    return best_ips
-
-def add_ci_to_row(ip_list: List[str], dst_ip: str, time: Optional[str]) -> Tuple[list, float]:
+            best_i = i
+
+    return ip_entries[best_i] if best_i >= 0 else _EMPTY_ENTRY
+
+def _resolve_location(ip: str) -> Optional[Dict[str, Any]]:
+    """Resolve one IP to its location via the cache, fetching on a miss."""
+    with _cache_lock:
+        cached = ip2loc_cache.get(ip)
+    if cached is not None:
+        return cached
+    loc_data, loc_err = ip_to_loc(ip, IPGEO_TOKEN)  # loc is (location_Data, error)
+    if loc_err is not None:
+        print(f"Error fetching location for IP {ip}: {loc_err}")
+        return None
+    with _cache_lock:
+        ip2loc_cache[ip] = loc_data
+    return loc_data
+
+
+def _resolve_ci(ip: str, loc_data: Dict[str, Any], time: str) -> Tuple[bool, Any]:
+    """
+    Resolve carbon intensity for one (ip, time) via the cache (valid while the
+    cached entry shares the hour), fetching on a miss. Returns (ok, value).
+    """
+    with _cache_lock:
+        cached_ci = loc2ci_cache.get(ip)
+    if cached_ci is not None:
+        cached_time = cached_ci.get("datetime")  # Assuming datetime is stored in the cache
+        if cached_time and cached_time[:13] == time[:13]:  # Compare until the hour
+            return True, cached_ci.get("carbonIntensity")
+    lat = loc_data.get("latitude")
+    lon = loc_data.get("longitude")
+    ci_data, ci_err = loc_to_ci(lat, lon, EM_TOKEN, time)  # ci is (data, error), where data is Dict[str, Any]
+    if ci_err is not None:
+        print(f"Error fetching carbon intensity for IP {ip}: {ci_err}")
+        return False, None
+    with _cache_lock:
+        loc2ci_cache[ip] = ci_data
+    return True, ci_data.get("carbonIntensity")
+
+
+def build_ci_lookup(wanted: Dict[Tuple[str, str], str]) -> Dict[Tuple[str, str], Any]:
+    """
+    Batch-resolve carbon intensity for every (ip, hour-bucket) pair the output
+    needs, in two parallel stages (locations for the unique IPs, then CI per
+    pair). The HTTP calls are I/O-bound, so a thread pool overlaps them
+    instead of paying one round-trip per IP per row; the row loop then does
+    plain dict lookups. Pairs that fail to resolve are simply absent.
+    """
+    lookup: Dict[Tuple[str, str], Any] = {}
+    if not wanted:
+        return lookup
+
+    unique_ips = {ip for ip, _ in wanted}
+    locations: Dict[str, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = {pool.submit(_resolve_location, ip): ip for ip in unique_ips}
+        for fut in as_completed(futures):
+            loc_data = fut.result()
+            if loc_data is not None:
+                locations[futures[fut]] = loc_data
+
+        ci_futures = {
+            pool.submit(_resolve_ci, ip, locations[ip], time): (ip, bucket)
+            for (ip, bucket), time in wanted.items()
+            if ip in locations
+        }
+        for fut in as_completed(ci_futures):
+            ok, value = fut.result()
+            if ok:
+                lookup[ci_futures[fut]] = value
+    return lookup
+
+
+def add_ci_to_row(
+    ip_list: List[str], dst_ip: str, time: Optional[str],
+    ci_lookup: Dict[Tuple[str, str], Any],
+) -> Tuple[list, float]:
     """
     Given a list of IPs and a destination IP, return a tuple containing:
     - A list of carbon intensities corresponding to each IP in the list.
     - The carbon intensity of the destination IP if it exists in the list; otherwise, -1.
+
+    All network resolution happened upfront in build_ci_lookup; this is now
+    one dict probe per IP.
     """
-    global ip2loc_cache, loc2ci_cache
     ci_list = []
     dst_ci = -1.0
+    bucket = time[:13] if time else ""
 
     for ip in ip_list:
-        # get location
-        if ip in ip2loc_cache:
-            loc_data = ip2loc_cache[ip]
-        else:
-            loc_data, loc_err = ip_to_loc(ip,IPGEO_TOKEN) # loc is (location_Data, error)    
-            if loc_err is not None:
-                print(f"Error fetching location for IP {ip}: {loc_err}")
-                ci_list.append(None)
-                continue
-            else:
-                ip2loc_cache[ip] = loc_data
-
-        lat = loc_data.get("latitude")
-        lon = loc_data.get("longitude")
-
-        # get carbon intensity
-        if ip in loc2ci_cache:
-            cached_ci = loc2ci_cache[ip]
-            cached_time = cached_ci.get("datetime")  # Assuming datetime is stored in the cache
-            if cached_time and cached_time[:13] == time[:13]:  # Compare until the hour
-                ci_data = cached_ci
-            else:
-                ci_data, ci_err = loc_to_ci(lat, lon, EM_TOKEN, time)  # ci is (data, error), where data is Dict[str, Any]
-                if ci_err is not None:
-                    print(f"Error fetching carbon intensity for IP {ip}: {ci_err}")
-                    ci_list.append(None)
-                    continue
-                else:
-                    loc2ci_cache[ip] = ci_data
-        else:
-            ci_data, ci_err = loc_to_ci(lat, lon, EM_TOKEN, time)  # ci is (data, error), where data is Dict[str, Any]
-            if ci_err is not None:
-                print(f"Error fetching carbon intensity for IP {ip}: {ci_err}")
-                ci_list.append(None)
-                continue
-            else:
-                loc2ci_cache[ip] = ci_data
-
-        carbon_intensity = ci_data.get("carbonIntensity")
+        key = (ip, bucket)
+        if key not in ci_lookup:
+            ci_list.append(None)
+            continue
+        carbon_intensity = ci_lookup[key]
         ci_list.append(carbon_intensity)
-
         if ip == dst_ip:
             dst_ci = carbon_intensity
-        
-    
-         
+
     return ci_list, dst_ci
 
 
@@ -179,28 +419,87 @@ def correlate(dns_json_path: str, ping_json_path: str, output_csv_path: str, max
     """
     Correlate DNS and ping measurements and write to CSV.
     """
-    # Try DNS extraction cache first
+    # Try DNS extraction cache first. The cache holds the lean
+    # (prb_id, ts, resolved_ips) triples rather than the full per-probe
+    # dict-of-dicts — everything the index needs, at a fraction of the RSS.
     dns_cache = _dns_cache_load(DNS_CACHE_FILE)
     dns_key = _file_fingerprint(dns_json_path)
     if dns_key in dns_cache:
         dns_results = dns_cache[dns_key]
     else:
-        dns_results = extract_probe_resolved_ips(dns_json_path)
+        dns_results = list(iter_probe_resolved_ips(dns_json_path))
         dns_cache[dns_key] = dns_results
         _dns_cache_save(DNS_CACHE_FILE, dns_cache)
     dns_index = build_dns_index(dns_results)
 
-    with open(ping_json_path, "r") as fin, open(output_csv_path, "w", newline="") as fout:
-        writer = csv.writer(fout)
-        writer.writerow(["probe_id", "timestamp", "readable_time", "src_ip", "selected_ip", "in_dns_set", "avg_rtt", "resolved_set", "ci_list", "selected_ip_ci"]) 
+    # C-accelerated JSON when available; both raise ValueError subclasses on
+    # bad input so one except covers either decoder.
+    loads = orjson.loads if orjson is not None else json.loads
+    dumps = (lambda o: orjson.dumps(o).decode()) if orjson is not None else json.dumps
+
+    # Multi-packet pings repeat the same (probe, timestamp) pair many times,
+    # so memoize the index lookup along with the CSV-quoted JSON form of the
+    # presorted tuple — the dumps allocation was being redone per row (the
+    # sort itself now happens once at index build).
+    resolved_cache: Dict[Tuple[int, int], Tuple[frozenset, tuple, str]] = {}
+
+    def resolved_for(prb_id: int, ts: int) -> Tuple[frozenset, tuple, str]:
+        key = (prb_id, ts)
+        hit = resolved_cache.get(key)
+        if hit is None:
+            selected_set, resolved_list = find_latest_resolved_set(dns_index.get(prb_id), ts)
+            hit = (selected_set, resolved_list, _csv_quote(dumps(list(resolved_list))))
+            resolved_cache[key] = hit
+        return hit
+
+    # Pass 1: collect every (ip, hour-bucket) pair the output will need, so
+    # the location/CI HTTP lookups can run as one parallel batch instead of
+    # serially inside the row loop.
+    wanted: Dict[Tuple[str, str], str] = {}
+    with open(ping_json_path, "r") as fin:
+        for line_num, line in enumerate(fin, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = loads(line)
+            except ValueError:
+                continue
+            if obj.get("type") != "ping":
+                continue
+            prb_id = obj.get("prb_id")
+            ts = obj.get("timestamp")
+            if prb_id is None or ts is None:
+                continue
+            ts_i = int(ts)
+            selected_set, _, _ = resolved_for(int(prb_id), ts_i)
+            if selected_set:
+                readable_time = _readable_time(ts_i)
+                bucket = readable_time[:13]
+                for ip in selected_set:
+                    wanted.setdefault((ip, bucket), readable_time)
+            if max_rows and line_num >= max_rows:
+                break
 
+    ci_lookup = build_ci_lookup(wanted)
+
+    with open(ping_json_path, "r") as fin, open(output_csv_path, "w", newline="") as fout:
+        fout.write("probe_id,timestamp,readable_time,src_ip,selected_ip,in_dns_set,avg_rtt,resolved_set,ci_list,selected_ip_ci\n")
+        # Rows are emitted as preformatted f-strings: the schema is fixed and
+        # every scalar field is known quote-safe (ints, ISO dates, IPs), so
+        # only the two JSON list fields need quoting, done by hand. csv.writer
+        # stays as the fallback for the (never-seen) case of an address
+        # containing a delimiter.
+        fallback_writer = csv.writer(fout)
+
+        batch: List[str] = []
         for line_num, line in enumerate(fin, 1):
             line = line.strip()
             if not line:
                 continue
             try:
-                obj = json.loads(line)
-            except json.JSONDecodeError:
+                obj = loads(line)
+            except ValueError:
                 continue
 
             if obj.get("type") != "ping":
@@ -216,29 +515,40 @@ def correlate(dns_json_path: str, ping_json_path: str, output_csv_path: str, max
             if prb_id is None or ts is None:
                 continue
 
-            selected_set = find_latest_resolved_set(dns_index.get(int(prb_id), []), int(ts))
+            ts_i = int(ts)
+            selected_set, resolved_list, resolved_csv = resolved_for(int(prb_id), ts_i)
             in_dns = dst_addr in selected_set if dst_addr else False
-            resolved_list = sorted(list(selected_set)) if selected_set else []
 
-            readable_time = datetime.fromtimestamp(int(ts)).isoformat()
-            
+            readable_time = _readable_time(ts_i)
+
             # Add carbon intensity information
-            ci_list, dst_ci = add_ci_to_row(resolved_list, dst_addr if dst_addr else "", readable_time)
-
-            writer.writerow([
-                prb_id,
-                ts,
-                readable_time,
-                src_addr if src_addr else "",
-                dst_addr if dst_addr else "",
-                int(in_dns),
-                avg if avg is not None else "",
-                json.dumps(resolved_list),
-                json.dumps(ci_list),
-                dst_ci
-            ])
+            ci_list, dst_ci = add_ci_to_row(resolved_list, dst_addr if dst_addr else "", readable_time, ci_lookup)
+
+            src = src_addr if src_addr else ""
+            dst = dst_addr if dst_addr else ""
+            if '"' in src or "," in src or '"' in dst or "," in dst:
+                if batch:
+                    fout.write("".join(batch))
+                    batch.clear()
+                fallback_writer.writerow([
+                    prb_id, ts, readable_time, src, dst, int(in_dns),
+                    avg if avg is not None else "",
+                    dumps(list(resolved_list)), dumps(ci_list), dst_ci,
+                ])
+            else:
+                batch.append(
+                    f"{prb_id},{ts},{readable_time},{src},{dst},{int(in_dns)},"
+                    f"{'' if avg is None else avg},{resolved_csv},"
+                    f"{_csv_quote(dumps(ci_list))},{dst_ci}\n"
+                )
+            # Batched writes cut per-row write dispatch and syscalls
+            if len(batch) >= 4096:
+                fout.write("".join(batch))
+                batch.clear()
             if max_rows and line_num >= max_rows:
                 break
+        if batch:
+            fout.write("".join(batch))
 
 
 def main():
@@ -250,11 +560,8 @@ def main():
 
     correlate(dns_json, ping_json, output_csv, max_rows)
     print(f"Written: {output_csv}")
-    # Save caches at the end
-    try:
-        save_cache(CACHE_FILE, ip2loc_cache, loc2ci_cache)
-    except Exception as e:
-        sys.stderr.write(f"Failed to write cache: {e}\n")
+    # No cache save step: the shelve-backed caches persist each key as it is
+    # written and are closed at exit.
 
 
 if __name__ == "__main__":
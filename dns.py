@@ -1,77 +1,347 @@
+import base64
+import functools
 import json
+from array import array
+import mmap
+import os
+import sys
+from datetime import datetime
 from ripe.atlas.sagan import DnsResult
+from ripe.atlas.sagan.helpers.abuf import AbufParser
 from collections import defaultdict
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:
+    pa = None
+    pq = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+_TIME_FMT = '%Y-%m-%d %H:%M:%S'
+
+# One frozenset membership test per answer instead of two chained string
+# compares — a single predictable branch even on mixed A/AAAA answers.
+_A_SET = frozenset(("A", "AAAA"))
+
+
+@functools.lru_cache(maxsize=4096)
+def _fmt_ts(ts):
+    """Atlas schedules measurements in shared time buckets, so probes repeat
+    the same timestamps — the LRU reduces most strftime calls to a dict hit."""
+    return datetime.fromtimestamp(ts).strftime(_TIME_FMT)
+
+
+@functools.lru_cache(maxsize=200_000)
+def _parse_abuf_answers(abuf_b64):
+    """
+    Decode one base64 abuf and return its A/AAAA answer addresses. Identical
+    abufs recur across probes (same authoritative answer), so the LRU drops
+    repeat decodes — the hottest inner work after JSON — to a dict probe.
+    Goes through sagan's AbufParser directly, skipping the full DnsResult
+    object model.
+    """
+    msg = AbufParser.parse(base64.b64decode(abuf_b64))
+    if not msg:
+        return ()
+    return tuple(
+        addr
+        for a in msg.get('AnswerSection', [])
+        if (addr := a.get('Address')) and a.get('Type') in _A_SET
+    )
+
+
+def _fast_line_measurement(line):
+    """
+    Parse one measurement line with direct dict access (orjson when
+    available), skipping sagan's per-response attribute-object model — the
+    dominant CPU cost of ingestion. Returns (prb_id, from_ip, timestamp,
+    resolved_ips, query_times), or None when the line carries no pre-decoded
+    answers so the caller can fall back to sagan's abuf decoding.
+    """
+    obj = _loads(line)
+    prb_id = obj["prb_id"]
+    from_ip = obj.get("from")
+    ts = obj["timestamp"]
+    resolved = set()
+    query_times = []
+    found_answers = False
+    for r in obj.get("resultset") or [obj]:
+        result = r.get("result")
+        if not isinstance(result, dict):
+            continue
+        answers = result.get("answers")
+        if answers is None:
+            abuf = result.get("abuf")
+            if not abuf:
+                continue
+            # No pre-decoded answers, but the wire message is present: decode
+            # it through the memoized abuf parser.
+            resolved.update(_parse_abuf_answers(abuf))
+            found_answers = True
+        else:
+            found_answers = True
+            add = resolved.add
+            for ans in answers:
+                if (rdata := ans.get("RDATA")) and ans.get("TYPE") in _A_SET:
+                    if isinstance(rdata, list):
+                        resolved.update(rdata)
+                    else:
+                        add(rdata)
+        t = r.get("time")
+        if t:
+            query_times.append(t)
+    if not found_answers:
+        return None
+    return prb_id, from_ip, ts, resolved, query_times
+
+
+def _iter_measurement_lines(json_file_path):
+    """
+    Yield raw measurement lines as bytes from an mmap'd view of the file: no
+    per-line UTF-8 decode or str allocation at the I/O layer (orjson and
+    stdlib json both accept bytes directly), which matters on multi-GB Atlas
+    dumps. Blank lines are skipped.
+    """
+    with open(json_file_path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return
+        try:
+            start = 0
+            size = mm.size()
+            while start < size:
+                nl = mm.find(b'\n', start)
+                if nl < 0:
+                    chunk = mm[start:size]
+                    start = size
+                else:
+                    chunk = mm[start:nl]
+                    start = nl + 1
+                if chunk.strip():
+                    yield chunk
+        finally:
+            mm.close()
+
+
+def _sagan_line_measurement(line):
+    """Fallback parse via sagan, which decodes the abuf when pre-parsed answers are absent."""
+    if isinstance(line, bytes):
+        line = line.decode('utf-8', 'replace')
+    dns_result = DnsResult(line.strip())
+    resolved = set()
+    query_times = []
+    # Single pass: resolved addresses and query times come off the same
+    # response objects, so collecting both at once halves the attribute
+    # walking over sagan's object model.
+    for response in dns_result.responses:
+        if response.abuf and response.abuf.raw_data:
+            answers = response.abuf.raw_data.get('AnswerSection', [])
+            add = resolved.add
+            for answer in answers:
+                if (addr := answer.get('Address')) and answer.get('Type') in _A_SET:
+                    add(addr)
+        t = getattr(response, 'time', None)
+        if t:
+            query_times.append(t)
+    return dns_result.probe_id, dns_result.origin, dns_result.created_timestamp, resolved, query_times
+
+
+def _parse_line_measurement(line):
+    """Fast dict-access parse with sagan as the abuf-decoding fallback."""
+    try:
+        parsed = _fast_line_measurement(line)
+    except (KeyError, ValueError, TypeError):
+        parsed = None
+    if parsed is None:
+        parsed = _sagan_line_measurement(line)
+    return parsed
+
+
+def iter_probe_resolved_ips(json_file_path):
+    """
+    Stream (probe_id, timestamp, resolved_ips) triples from the measurement
+    file one line at a time. The file is newline-delimited JSON, so the line
+    loop is already the streaming parse; consumers that only need the
+    resolved A/AAAA addresses (like the DNS/ping correlation) get them
+    without the full per-probe dict-of-dicts that extract_probe_resolved_ips
+    accumulates — peak memory stays at one measurement.
+    """
+    for line_num, line in enumerate(_iter_measurement_lines(json_file_path), 1):
+        try:
+            prb_id, _, ts, resolved, _ = _parse_line_measurement(line)
+            # Measurements with no resolved addresses are yielded too: the
+            # correlation index keys off every timestamp, and skipping them
+            # would make find_latest_resolved_set pick a different neighbor.
+            yield prb_id, ts, sorted(resolved)
+        except Exception as e:
+            print(f"Error processing line {line_num}: {e}")
+            continue
+
+
+def _parse_cache_path(json_file_path):
+    return json_file_path + ".parquet"
+
+
+def _load_parse_cache(json_file_path):
+    """
+    Load a previously extracted result set from the Parquet sidecar, or None
+    when pyarrow is unavailable, the cache is missing, or the measurement
+    file has been modified since the cache was written. Columnar reads skip
+    the JSON/abuf parse entirely, so warm runs are near-instant.
+    """
+    if pq is None:
+        return None
+    cache_path = _parse_cache_path(json_file_path)
+    try:
+        if os.path.getmtime(cache_path) < os.path.getmtime(json_file_path):
+            return None
+        cols = pq.read_table(cache_path).to_pydict()
+    except (OSError, ValueError, KeyError):
+        return None
+
+    probe_results = {}
+    for prb_id, p_ip, ts, ips, qtimes in zip(
+        cols["probe_id"], cols["probe_ip"], cols["timestamp"],
+        cols["resolved_ips"], cols["query_times"],
+    ):
+        entry = probe_results.setdefault(prb_id, {
+            'probe_id': prb_id,
+            'probe_ip': p_ip,
+            'measurements': {}
+        })
+        entry['measurements'][ts] = {
+            'timestamp': ts,
+            'resolved_ips': list(ips),
+            'query_times': list(qtimes),
+        }
+    return probe_results
+
+
+def _save_parse_cache(json_file_path, probe_results):
+    """
+    Persist the extracted results as one Parquet row per measurement
+    (resolved_ips and query_times as list columns). Best-effort: any write
+    failure just means the next run re-parses.
+    """
+    if pa is None:
+        return
+    prb_ids, probe_ips, timestamps, ip_lists, qtime_lists = [], [], [], [], []
+    for prb_id, data in probe_results.items():
+        for ts, m in data['measurements'].items():
+            prb_ids.append(prb_id)
+            probe_ips.append(data['probe_ip'])
+            timestamps.append(ts)
+            ip_lists.append(m['resolved_ips'])
+            qtime_lists.append(m['query_times'])
+    table = pa.table({
+        "probe_id": prb_ids,
+        "probe_ip": probe_ips,
+        "timestamp": timestamps,
+        "resolved_ips": ip_lists,
+        "query_times": qtime_lists,
+    })
+    try:
+        pq.write_table(table, _parse_cache_path(json_file_path), compression="zstd")
+    except OSError as e:
+        print(f"Warning: could not write parse cache: {e}")
+
+
 def extract_probe_resolved_ips(json_file_path):
     """
     Extract resolved IP addresses from each probe in the RIPE Atlas DNS measurement
     using the ripe.atlas.sagan library, associating each set of IPs with their timestamp.
+    Results are cached in a Parquet sidecar next to the input so repeat runs
+    skip the parse.
     """
+    cached = _load_parse_cache(json_file_path)
+    if cached is not None:
+        return cached
+
+    # SoA accumulation: IPs are interned to int ids once and each measurement
+    # holds a flat int buffer instead of a per-measurement set of strings —
+    # no set-hashing of IP strings in the hot loop and a fraction of the
+    # memory. The nested dict shape callers expect is materialized only at
+    # the end, translating ids back to strings.
+    ip_intern = {}
+    ip_names = []
+    probe_ip = {}
+    meas_ids = {}      # (prb_id, ts) -> list of interned IP ids
+    meas_qtimes = {}   # (prb_id, ts) -> array('d') of query timestamps
+
+    for line_num, line in enumerate(_iter_measurement_lines(json_file_path), 1):
+        try:
+            prb_id, from_ip, measurement_timestamp, resolved, query_times = _parse_line_measurement(line)
+
+            probe_ip.setdefault(prb_id, from_ip)
+            key = (prb_id, measurement_timestamp)
+            buf = meas_ids.setdefault(key, [])
+            for ip in resolved:
+                ip_id = ip_intern.get(ip)
+                if ip_id is None:
+                    ip_id = len(ip_names)
+                    ip_intern[ip] = ip_id
+                    ip_names.append(ip)
+                buf.append(ip_id)
+            if query_times:
+                # array('d') packs doubles contiguously — no per-element
+                # float object in the accumulation phase.
+                meas_qtimes.setdefault(key, array('d')).extend(query_times)
+
+        except Exception as e:
+            print(f"Error processing line {line_num}: {e}")
+            continue
+
+    # Materialize the public structure: dedupe the int buffers (np.unique
+    # when available), translate back to strings and sort for consistent
+    # output.
     probe_results = {}
-    
-    with open(json_file_path, 'r') as file:
-        for line_num, line in enumerate(file, 1):
-            try:
-                # Parse the measurement data using sagan
-                dns_result = DnsResult(line.strip())
-                
-                # Get probe information
-                prb_id = dns_result.probe_id
-                from_ip = dns_result.origin
-                measurement_timestamp = dns_result.created_timestamp
-                
-                # Initialize probe info if not exists
-                if prb_id not in probe_results:
-                    probe_results[prb_id] = {
-                        'probe_id': prb_id,
-                        'probe_ip': from_ip,
-                        'measurements': {}  # Changed from 'resolved_ips' to 'measurements'
-                    }
-                
-                # Initialize timestamp entry if not exists
-                if measurement_timestamp not in probe_results[prb_id]['measurements']:
-                    probe_results[prb_id]['measurements'][measurement_timestamp] = {
-                        'timestamp': measurement_timestamp,
-                        'resolved_ips': set(),
-                        'query_times': []  # Store individual query timestamps
-                    }
-                
-                # Extract resolved IP addresses from DNS responses and associate with timestamps
-                for response in dns_result.responses:
-                    if response.abuf and response.abuf.raw_data:
-                        # Get answers from the parsed DNS message
-                        answers = response.abuf.raw_data.get('AnswerSection', [])
-                        for answer in answers:
-                            # Check if this is an A record (IPv4)
-                            if answer.get('Type') == 'A' and answer.get('Address'):
-                                probe_results[prb_id]['measurements'][measurement_timestamp]['resolved_ips'].add(answer['Address'])
-                            
-                            # Check if this is an AAAA record (IPv6)
-                            elif answer.get('Type') == 'AAAA' and answer.get('Address'):
-                                probe_results[prb_id]['measurements'][measurement_timestamp]['resolved_ips'].add(answer['Address'])
-                
-                # Store individual query timestamps from the resultset
-                for response in dns_result.responses:
-                    if hasattr(response, 'time') and response.time:
-                        probe_results[prb_id]['measurements'][measurement_timestamp]['query_times'].append(response.time)
-                
-            except Exception as e:
-                print(f"Error processing line {line_num}: {e}")
-                continue
-    
-    # Convert sets to sorted lists for consistent output and sort by timestamp
-    for prb_id in probe_results:
-        for timestamp in probe_results[prb_id]['measurements']:
-            measurement = probe_results[prb_id]['measurements'][timestamp]
-            measurement['resolved_ips'] = sorted(list(measurement['resolved_ips']))
-            measurement['query_times'] = sorted(list(set(measurement['query_times'])))  # Remove duplicates and sort
-    
+    for (prb_id, timestamp), buf in meas_ids.items():
+        if np is not None and buf:
+            unique_ids = np.unique(np.asarray(buf, dtype=np.int32))
+            resolved_ips = sorted(ip_names[i] for i in unique_ids)
+        else:
+            resolved_ips = sorted(ip_names[i] for i in set(buf))
+
+        entry = probe_results.setdefault(prb_id, {
+            'probe_id': prb_id,
+            'probe_ip': probe_ip.get(prb_id),
+            'measurements': {}  # Changed from 'resolved_ips' to 'measurements'
+        })
+        qtimes = meas_qtimes.get((prb_id, timestamp))
+        if qtimes is None:
+            query_times = []
+        elif np is not None:
+            # sorted-unique in one C call over the packed double buffer
+            query_times = np.unique(np.frombuffer(qtimes, dtype=np.float64)).tolist()
+        else:
+            query_times = sorted(set(qtimes))
+
+        entry['measurements'][timestamp] = {
+            'timestamp': timestamp,
+            'resolved_ips': resolved_ips,
+            'query_times': query_times,
+        }
+
     # Only return probes that have resolved IPs
     filtered_results = {}
     for prb_id, data in probe_results.items():
         if any(len(measurement['resolved_ips']) > 0 for measurement in data['measurements'].values()):
             filtered_results[prb_id] = data
-    
+
+    _save_parse_cache(json_file_path, filtered_results)
     return filtered_results
 
 def analyze_dns_responses(json_file_path, sample_size=5):
@@ -135,46 +405,51 @@ def main():
     
     print("Extracting resolved IP addresses from RIPE Atlas DNS measurement using ripe.atlas.sagan...")
     probe_results = extract_probe_resolved_ips(json_file)
-    
-    print(f"\nFound {len(probe_results)} probes with resolved IP addresses:")
-    print("=" * 80)
-    
+
+    # Buffer the whole report and emit it with one write: per-line print
+    # calls each take the interpreter I/O lock and flush, which dominates
+    # the reporting phase on large result sets.
+    buf = []
+    buf.append(f"\nFound {len(probe_results)} probes with resolved IP addresses:")
+    buf.append("=" * 80)
+
     total_measurements = 0
     total_unique_ips = set()
-    
+
     for prb_id in sorted(probe_results.keys()):
         result = probe_results[prb_id]
-        print(f"Probe ID: {result['probe_id']}")
-        print(f"Probe IP: {result['probe_ip']}")
-        
+        buf.append(f"Probe ID: {result['probe_id']}")
+        buf.append(f"Probe IP: {result['probe_ip']}")
+
         # Sort measurements by timestamp
         sorted_timestamps = sorted(result['measurements'].keys())
-        print(f"Measurements ({len(sorted_timestamps)}):")
-        
+        buf.append(f"Measurements ({len(sorted_timestamps)}):")
+
         for timestamp in sorted_timestamps:
             measurement = result['measurements'][timestamp]
             total_measurements += 1
-            
+
             # Convert Unix timestamp to readable format
-            from datetime import datetime
-            readable_time = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-            
-            print(f"  Timestamp: {timestamp} ({readable_time})")
-            print(f"  Resolved IPs ({len(measurement['resolved_ips'])}):")
+            readable_time = _fmt_ts(timestamp)
+
+            buf.append(f"  Timestamp: {timestamp} ({readable_time})")
+            buf.append(f"  Resolved IPs ({len(measurement['resolved_ips'])}):")
             for ip in measurement['resolved_ips']:
-                print(f"    {ip}")
+                buf.append(f"    {ip}")
                 total_unique_ips.add(ip)
-            
+
             if measurement['query_times']:
-                print(f"  Query times: {measurement['query_times']}")
-            print()
-        
-        print("-" * 80)
-    
-    print(f"\nSummary:")
-    print(f"Total probes with DNS results: {len(probe_results)}")
-    print(f"Total measurements: {total_measurements}")
-    print(f"Total unique resolved IP addresses: {len(total_unique_ips)}")
+                buf.append(f"  Query times: {measurement['query_times']}")
+            buf.append("")
+
+        buf.append("-" * 80)
+
+    buf.append("\nSummary:")
+    buf.append(f"Total probes with DNS results: {len(probe_results)}")
+    buf.append(f"Total measurements: {total_measurements}")
+    buf.append(f"Total unique resolved IP addresses: {len(total_unique_ips)}")
+    sys.stdout.write("\n".join(buf))
+    sys.stdout.write("\n")
     
     # Show detailed analysis for a sample
     analyze_dns_responses(json_file, sample_size=3)
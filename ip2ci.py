@@ -1,21 +1,60 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import csv
 import json
 import os
 import sys
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Optional, Tuple, Any, Set
 
+try:
+    import pandas as pd  # type: ignore
+except ImportError:
+    pd = None
+
+try:
+    import requests  # type: ignore
+except ImportError:
+    requests = None
+
+try:
+    import aiohttp  # type: ignore
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+
+# One shared Session keeps the TLS connection alive across calls, saving a
+# handshake + round-trip per request versus urllib's one-shot urlopen.
+_session = requests.Session() if requests is not None else None
+
 
 IPLOCATION_ENDPOINT = "https://api.ipgeolocation.io/v2/ipgeo"
+IPLOCATION_BULK_ENDPOINT = "https://api.ipgeolocation.io/v2/ipgeo-bulk"
 ELECTRICITYMAPS_ENDPOINT = "https://api.electricitymaps.com/v3/carbon-intensity"
 
 
-def http_get_json(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+def http_get_json(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0, session: Optional[Any] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    sess = session if session is not None else _session
+    if sess is not None:
+        try:
+            resp = sess.get(url, headers=headers, timeout=timeout)
+            if resp.status_code >= 400:
+                return None, f"HTTPError {resp.status_code}: {resp.text}"
+            return resp.json(), None
+        except requests.RequestException as e:
+            return None, f"Error: {e}"
+
     req = urllib.request.Request(url)
     if headers:
         for k, v in headers.items():
@@ -37,12 +76,46 @@ def http_get_json(url: str, headers: Optional[Dict[str, str]] = None, timeout: f
         return None, f"Error: {e}"
 
 
-def ip_to_loc(ip: str, token:str) -> Tuple[Optional[Dict], Optional[str]]:
+def http_post_json(url: str, payload: Any, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0, session: Optional[Any] = None) -> Tuple[Optional[Any], Optional[str]]:
+    sess = session if session is not None else _session
+    if sess is not None:
+        try:
+            resp = sess.post(url, json=payload, headers=headers, timeout=timeout)
+            if resp.status_code >= 400:
+                return None, f"HTTPError {resp.status_code}: {resp.text}"
+            return resp.json(), None
+        except requests.RequestException as e:
+            return None, f"Error: {e}"
+
+    body = json.dumps(payload).encode("utf-8")
+    all_headers = {"Content-Type": "application/json"}
+    if headers:
+        all_headers.update(headers)
+    req = urllib.request.Request(url, data=body, headers=all_headers, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            charset = resp.headers.get_content_charset() or "utf-8"
+            data = resp.read().decode(charset, errors="replace")
+            return json.loads(data), None
+    except urllib.error.HTTPError as e:
+        try:
+            body_text = e.read().decode("utf-8", errors="replace")
+        except Exception:
+            body_text = str(e)
+        return None, f"HTTPError {e.code}: {body_text}"
+    except urllib.error.URLError as e:
+        return None, f"URLError: {e.reason}"
+    except Exception as e:
+        return None, f"Error: {e}"
+
+
+def ip_to_loc(ip: str, token:str, session: Optional[Any] = None) -> Tuple[Optional[Dict], Optional[str]]:
     """
-    Returns (location_Data, error)
+    Returns (location_Data, error). An explicit requests.Session reuses its
+    connection pool across calls.
     """
     url = f"{IPLOCATION_ENDPOINT}?apiKey={urllib.parse.quote(token)}&ip={urllib.parse.quote(ip)}"
-    data, err = http_get_json(url)
+    data, err = http_get_json(url, session=session)
     if err:
         return None, err
     if not isinstance(data, dict):
@@ -53,23 +126,47 @@ def ip_to_loc(ip: str, token:str) -> Tuple[Optional[Dict], Optional[str]]:
     return (data["location"], None)
 
 
-def loc_to_ci(lat: str, lon: str, token: str, time: Optional[str]=None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+def ip_to_loc_batch(ips: Any, token: str, session: Optional[Any] = None, batch_size: int = 100) -> Any:
+    """
+    Resolve locations for many IPs via the bulk endpoint: one POST (and TLS
+    round-trip) per 100 IPs instead of one GET each. Returns a list of
+    (location_Data, error) tuples aligned with `ips`; any group whose batch
+    call fails falls back to per-IP ip_to_loc so partial outages degrade
+    rather than fail the batch.
+    """
+    url = f"{IPLOCATION_BULK_ENDPOINT}?apiKey={urllib.parse.quote(token)}"
+    results = []
+    for start in range(0, len(ips), batch_size):
+        group = list(ips[start:start + batch_size])
+        data, err = http_post_json(url, {"ips": group}, session=session)
+        if err or not isinstance(data, list) or len(data) != len(group):
+            results.extend(ip_to_loc(ip, token, session=session) for ip in group)
+            continue
+        for item in data:
+            if isinstance(item, dict) and "location" in item:
+                results.append((item["location"], None))
+            else:
+                results.append((None, "missing location field"))
+    return results
+
+
+def loc_to_ci(lat: str, lon: str, token: str, time: Optional[str]=None, session: Optional[Any] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
     Query ElectricityMaps for carbon intensity of a geographical location. Returns (data, error).
     If time is None, fetch latest; otherwise fetch past data for the given ISO 8601 datetime string.
     """
-    endpoint = ELECTRICITYMAPS_ENDPOINT
-
+    # Pure local URL construction: the module-level endpoint constant is
+    # never touched, so repeated calls cannot accumulate path suffixes.
     if time is None:
         query = urllib.parse.urlencode({"lat": lat, "lon": lon})
-        endpoint += "/latest"
+        endpoint = ELECTRICITYMAPS_ENDPOINT + "/latest"
     else:
         query = urllib.parse.urlencode({"lat": lat, "lon": lon, "datetime": time})
-        endpoint += "/past"
+        endpoint = ELECTRICITYMAPS_ENDPOINT + "/past"
 
     url = f"{endpoint}?{query}"
     headers = {"auth-token": token}
-    data, err = http_get_json(url, headers=headers)
+    data, err = http_get_json(url, headers=headers, session=session)
     if err:
         return None, err
     if not isinstance(data, dict):
@@ -77,28 +174,191 @@ def loc_to_ci(lat: str, lon: str, token: str, time: Optional[str]=None) -> Tuple
     return data, None
 
 
+# The cache is an append-only JSONL log: each line is one
+# {"kind": "ip2loc"|"loc2ci", "key": ..., "value": ...} record, and the
+# dicts are rebuilt at load (last record for a key wins). Checkpoints then
+# cost O(new entries) appends instead of a full-dict rewrite, and a torn
+# final line after a crash just gets skipped. Per-path bookkeeping tracks
+# which keys are already on disk and how many log lines exist so save_cache
+# can append only deltas and compact when the log grows stale.
+_json_dumps = orjson.dumps if orjson is not None else (lambda o: json.dumps(o).encode())
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+_persisted_keys: Dict[str, set] = {}
+_log_lines: Dict[str, int] = {}
+
+_COMPACT_MIN_LINES = 10_000
+
+
 def load_cache(cache_path: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     if not cache_path or not os.path.exists(cache_path):
         return {}, {}
+    ip2loc: Dict[str, Any] = {}
+    loc2ci: Dict[str, Any] = {}
+    persisted = _persisted_keys.setdefault(cache_path, set())
+    lines = 0
     try:
-        with open(cache_path, "r", encoding="utf-8") as f:
-            blob = json.load(f)
-        return blob.get("ip2loc", {}), blob.get("loc2ci", {})
-    except Exception:
+        with open(cache_path, "rb") as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                lines += 1
+                try:
+                    rec = _json_loads(raw)
+                except ValueError:
+                    continue  # torn tail line from an interrupted append
+                kind, key = rec.get("kind"), rec.get("key")
+                if kind == "ip2loc":
+                    ip2loc[key] = rec.get("value")
+                elif kind == "loc2ci":
+                    loc2ci[key] = rec.get("value")
+                else:
+                    continue
+                persisted.add((kind, key))
+    except OSError:
         return {}, {}
+    _log_lines[cache_path] = lines
+    return ip2loc, loc2ci
+
+
+def _compact_cache(cache_path: str, ip2loc: Dict[str, Any], loc2ci: Dict[str, Any]) -> None:
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for key, value in ip2loc.items():
+            f.write(_json_dumps({"kind": "ip2loc", "key": key, "value": value}) + b"\n")
+        for key, value in loc2ci.items():
+            f.write(_json_dumps({"kind": "loc2ci", "key": key, "value": value}) + b"\n")
+    os.replace(tmp_path, cache_path)
+    _persisted_keys[cache_path] = {("ip2loc", k) for k in ip2loc} | {("loc2ci", k) for k in loc2ci}
+    _log_lines[cache_path] = len(ip2loc) + len(loc2ci)
 
 
 def save_cache(cache_path: Optional[str], ip2loc: Dict[str, Any], loc2ci: Dict[str, Any]) -> None:
     if not cache_path:
         return
     os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
-    tmp_path = f"{cache_path}.tmp"
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump({"ip2loc": ip2loc, "loc2ci": loc2ci}, f, ensure_ascii=False, indent=2)
-    os.replace(tmp_path, cache_path)
+    persisted = _persisted_keys.setdefault(cache_path, set())
+    lines = _log_lines.get(cache_path, 0)
+
+    # Rewrite once when the log has accumulated enough superseded lines;
+    # otherwise append just the records not yet on disk.
+    total = len(ip2loc) + len(loc2ci)
+    if lines >= _COMPACT_MIN_LINES and lines > 2 * total:
+        _compact_cache(cache_path, ip2loc, loc2ci)
+        return
+
+    with open(cache_path, "ab") as f:
+        for kind, mapping in (("ip2loc", ip2loc), ("loc2ci", loc2ci)):
+            for key, value in mapping.items():
+                if (kind, key) in persisted:
+                    continue
+                f.write(_json_dumps({"kind": kind, "key": key, "value": value}) + b"\n")
+                persisted.add((kind, key))
+                lines += 1
+    _log_lines[cache_path] = lines
+
+
+class SqliteCache:
+    """
+    Shared per-key cache for cross-process IP->CI lookups, backed by stdlib
+    sqlite3 (same role a Redis instance would play, without a server): each
+    get/set touches one row instead of deserializing a whole cache file, and
+    WAL mode lets concurrent driver/test scripts share it safely. Values are
+    JSON blobs; expired rows are treated as misses and overwritten in place.
+
+    Selected with --cache-backend sqlite; keys are namespaced per mapping
+    (e.g. "ip:<addr>" for locations) via _SqliteCacheView below.
+    """
+
+    def __init__(self, path: str = "./output/ip2ci_cache.sqlite") -> None:
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB, expires REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn.execute(
+            "SELECT value, expires FROM kv WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        if expires is not None and expires < time.time():
+            return None
+        return _json_loads(value)
+
+    def set(self, key: str, value: Any, ex: Optional[float] = 86400.0) -> None:
+        expires = time.time() + ex if ex is not None else None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+            (key, _json_dumps(value), expires),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class _SqliteCacheView:
+    """
+    Dict-shaped view over one key namespace of a SqliteCache, so the resolve
+    paths can use it interchangeably with the in-memory cache dicts. Each
+    __setitem__ is durable on its own, which is why the sqlite backend skips
+    the periodic JSONL checkpoints.
+    """
+
+    def __init__(self, cache: SqliteCache, prefix: str) -> None:
+        self._cache = cache
+        self._prefix = prefix
+
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        value = self._cache.get(f"{self._prefix}:{key}")
+        return default if value is None else value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._cache.set(f"{self._prefix}:{key}", value)
+
+
+class RateLimiter:
+    """
+    Token-bucket style limiter shared by the worker threads: each waiter
+    reserves the next slot under the lock and sleeps only its own delay, so
+    requests stay `interval` seconds apart in aggregate without serializing
+    the pool behind one blocking sleep.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self.interval
+        if delay:
+            time.sleep(delay)
 
 
 def read_unique_ips_from_dns_csv(dns_csv_path: str) -> Set[str]:
+    if pd is not None:
+        # Vectorized path: the C CSV parser plus split/explode string kernels
+        # replace the per-row DictReader strip/split loop.
+        try:
+            ips = pd.read_csv(dns_csv_path, usecols=["ips"], dtype=str)["ips"]
+        except ValueError:
+            raise ValueError("Input CSV missing required 'ips' column")
+        exploded = ips.dropna().str.split(";").explode().str.strip()
+        return set(exploded[exploded != ""].unique())
+
     unique_ips: Set[str] = set()
     with open(dns_csv_path, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -135,12 +395,184 @@ def write_output_csv(rows: Any, out_csv_path: str) -> None:
             writer.writerow(r)
 
 
+async def _fetch_json(session: "aiohttp.ClientSession", url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    try:
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            if resp.status >= 400:
+                return None, f"HTTPError {resp.status}: {await resp.text()}"
+            return await resp.json(), None
+    except aiohttp.ClientError as e:
+        return None, f"Error: {e}"
+    except asyncio.TimeoutError:
+        return None, "Error: timeout"
+
+
+async def ip_to_loc_async(
+    ip: str,
+    token: str,
+    session: "aiohttp.ClientSession",
+    sem: Optional["asyncio.Semaphore"] = None,
+) -> Tuple[Optional[Dict], Optional[str]]:
+    """Async twin of ip_to_loc for aiohttp callers; sem bounds concurrency."""
+    url = f"{IPLOCATION_ENDPOINT}?apiKey={urllib.parse.quote(token)}&ip={urllib.parse.quote(ip)}"
+    if sem is not None:
+        async with sem:
+            data, err = await _fetch_json(session, url)
+    else:
+        data, err = await _fetch_json(session, url)
+    if err:
+        return None, err
+    if not isinstance(data, dict):
+        return None, "invalid JSON"
+    if "location" not in data:
+        return None, "missing location field"
+    return (data["location"], None)
+
+
+async def loc_to_ci_async(
+    lat: str,
+    lon: str,
+    token: str,
+    time: Optional[str] = None,
+    session: Optional["aiohttp.ClientSession"] = None,
+    sem: Optional["asyncio.Semaphore"] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Async twin of loc_to_ci; same URL construction and validation."""
+    if time is None:
+        query = urllib.parse.urlencode({"lat": lat, "lon": lon})
+        endpoint = ELECTRICITYMAPS_ENDPOINT + "/latest"
+    else:
+        query = urllib.parse.urlencode({"lat": lat, "lon": lon, "datetime": time})
+        endpoint = ELECTRICITYMAPS_ENDPOINT + "/past"
+    url = f"{endpoint}?{query}"
+    headers = {"auth-token": token}
+    if sem is not None:
+        async with sem:
+            data, err = await _fetch_json(session, url, headers=headers)
+    else:
+        data, err = await _fetch_json(session, url, headers=headers)
+    if err:
+        return None, err
+    if not isinstance(data, dict):
+        return None, "invalid JSON"
+    return data, None
+
+
+async def _resolve_ips_async(
+    ips: Set[str],
+    token: str,
+    cache_path: Optional[str],
+    ip_country_cache: Dict[str, Any],
+    country_carbon_cache: Dict[str, Any],
+    interval: float,
+) -> Any:
+    """
+    Resolve all IPs on one event loop: a single keep-alive connection pool
+    instead of one OS thread per in-flight request, a semaphore bounding
+    concurrency, and no cache lock since every coroutine runs on the same
+    thread.
+    """
+    sem = asyncio.Semaphore(32)
+    next_slot = 0.0
+    completed = 0
+
+    async def pace() -> None:
+        # Same reserved-slot pacing as RateLimiter, with asyncio.sleep.
+        nonlocal next_slot
+        if interval <= 0:
+            return
+        now = time.monotonic()
+        delay = max(0.0, next_slot - now)
+        next_slot = max(now, next_slot) + interval
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def resolve_ip(session: "aiohttp.ClientSession", ip: str) -> Dict[str, Any]:
+        nonlocal completed
+        # IP -> location/country
+        cached = ip_country_cache.get(ip)
+        if cached is not None:
+            country_code = cached.get("country_code")
+            country_name = cached.get("country_name")
+            lat, lon = cached.get("latitude"), cached.get("longitude")
+            ip_country_err = cached.get("error")
+        else:
+            async with sem:
+                await pace()
+                url = f"{IPLOCATION_ENDPOINT}?apiKey={urllib.parse.quote(token)}&ip={urllib.parse.quote(ip)}"
+                data, ip_country_err = await _fetch_json(session, url)
+            loc = (data or {}).get("location") or {}
+            country_code = loc.get("country_code2") or loc.get("country_code")
+            country_name = loc.get("country_name")
+            lat, lon = loc.get("latitude"), loc.get("longitude")
+            ip_country_cache[ip] = {
+                "country_code": country_code,
+                "country_name": country_name,
+                "latitude": lat,
+                "longitude": lon,
+                "error": ip_country_err,
+            }
+
+        # Country -> carbon
+        carbon = None
+        carbon_err = None
+        if country_code:
+            carbon = country_carbon_cache.get(country_code)
+            if carbon is not None:
+                carbon_err = carbon.get("error")
+            else:
+                async with sem:
+                    await pace()
+                    query = urllib.parse.urlencode({"lat": lat, "lon": lon})
+                    url = f"{ELECTRICITYMAPS_ENDPOINT}/latest?{query}"
+                    data, err = await _fetch_json(session, url, headers={"auth-token": token})
+                if err:
+                    country_carbon_cache[country_code] = {"error": err}
+                    carbon_err = err
+                else:
+                    country_carbon_cache[country_code] = data
+                    carbon = data
+        else:
+            carbon_err = ip_country_err or "no country code"
+
+        completed += 1
+        if completed % 50 == 0:
+            save_cache(cache_path, ip_country_cache, country_carbon_cache)
+
+        return {
+            "ip": ip,
+            "country_code": country_code or "",
+            "country_name": country_name or "",
+            "carbonIntensity": (carbon or {}).get("carbonIntensity", ""),
+            "datetime": (carbon or {}).get("datetime", ""),
+            "updatedAt": (carbon or {}).get("updatedAt", ""),
+            "emissionFactorType": (carbon or {}).get("emissionFactorType", ""),
+            "isEstimated": (carbon or {}).get("isEstimated", ""),
+            "error": carbon_err or ip_country_err or "",
+        }
+
+    connector = aiohttp.TCPConnector(limit=32)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return list(await asyncio.gather(*(resolve_ip(session, ip) for ip in sorted(ips))))
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Map IPs from DNS CSV to country and carbon intensity")
     parser.add_argument("-i", "--input", default="./output/dns_a_records.csv", help="Path to dns_a_records.csv")
     parser.add_argument("-o", "--output", default="./output/ip_country_carbon.csv", help="Path to write output CSV")
     parser.add_argument("--token", required=True, help="ElectricityMaps API auth-token")
-    parser.add_argument("--cache", default="./output/ip_country_carbon_cache.json", help="Optional cache JSON path")
+    parser.add_argument("--cache", default="./output/ip_country_carbon_cache.jsonl", help="Optional cache JSONL log path")
+    parser.add_argument(
+        "--cache-backend",
+        choices=("jsonl", "sqlite"),
+        default="jsonl",
+        help=(
+            "Cache storage: 'jsonl' is the in-memory dicts backed by the "
+            "append-only log at --cache; 'sqlite' stores each entry as a row "
+            "in a shared WAL database (the --cache path with a .sqlite "
+            "suffix), so concurrent runs can share one cache."
+        ),
+    )
     parser.add_argument("--sleep", type=float, default=0.2, help="Sleep seconds between API calls (rate limiting)")
     args = parser.parse_args()
 
@@ -151,44 +583,119 @@ def main() -> None:
         sys.stderr.write(f"Failed to read input CSV: {e}\n")
         sys.exit(1)
 
-    # Load caches
-    ip_country_cache, country_carbon_cache = load_cache(args.cache)
+    # Load caches. The sqlite backend hands the resolve paths dict-shaped
+    # views over one shared database; every write is durable immediately, so
+    # checkpoint_path is None and the periodic/final JSONL saves no-op.
+    kv = None
+    if args.cache_backend == "sqlite":
+        base = os.path.splitext(args.cache)[0] if args.cache else "./output/ip2ci_cache"
+        kv = SqliteCache(base + ".sqlite")
+        ip_country_cache = _SqliteCacheView(kv, "ip")
+        country_carbon_cache = _SqliteCacheView(kv, "ci")
+        checkpoint_path = None
+    else:
+        ip_country_cache, country_carbon_cache = load_cache(args.cache)
+        checkpoint_path = args.cache
+
+    # The loop is almost entirely network wait. Preferred path: one asyncio
+    # event loop with a pooled aiohttp session — same wallclock as the thread
+    # pool at a fraction of the memory (no per-request thread stacks) and
+    # lock-free cache updates. The thread pool below remains the fallback
+    # when aiohttp is not installed: the limiter keeps aggregate request
+    # spacing at args.sleep, the lock guards the shared caches, and the cache
+    # is checkpointed periodically so an interrupted run keeps its progress.
+    if aiohttp is not None:
+        rows = asyncio.run(
+            _resolve_ips_async(
+                unique_ips,
+                args.token,
+                checkpoint_path,
+                ip_country_cache,
+                country_carbon_cache,
+                args.sleep,
+            )
+        )
+    else:
+        rows = _resolve_ips_threaded(
+            unique_ips, args, checkpoint_path, ip_country_cache, country_carbon_cache
+        )
+    rows.sort(key=lambda r: r["ip"])
 
-    rows = []
-    for ip in sorted(unique_ips):
-        # IP -> country
-        if ip in ip_country_cache:
-            country_code = ip_country_cache[ip].get("country_code")
-            country_name = ip_country_cache[ip].get("country_name")
-            ip_country_err = None
+    # Save outputs
+    try:
+        write_output_csv(rows, args.output)
+    except Exception as e:
+        sys.stderr.write(f"Failed to write output CSV: {e}\n")
+        sys.exit(1)
+
+    # Save cache at the end
+    try:
+        save_cache(checkpoint_path, ip_country_cache, country_carbon_cache)
+    except Exception as e:
+        sys.stderr.write(f"Failed to write cache: {e}\n")
+    if kv is not None:
+        kv.close()
+
+
+def _resolve_ips_threaded(
+    unique_ips: Set[str],
+    args: argparse.Namespace,
+    cache_path: Optional[str],
+    ip_country_cache: Dict[str, Any],
+    country_carbon_cache: Dict[str, Any],
+) -> Any:
+    cache_lock = threading.Lock()
+    limiter = RateLimiter(args.sleep)
+
+    def resolve_ip(ip: str) -> Dict[str, Any]:
+        # IP -> location/country, same cache entry shape as the async path.
+        with cache_lock:
+            cached = ip_country_cache.get(ip)
+        if cached is not None:
+            country_code = cached.get("country_code")
+            country_name = cached.get("country_name")
+            lat, lon = cached.get("latitude"), cached.get("longitude")
+            ip_country_err = cached.get("error")
         else:
-            code, name, ip_err = ip_to_loc(ip)
-            ip_country_cache[ip] = {"country_code": code, "country_name": name, "error": ip_err}
-            country_code, country_name, ip_country_err = code, name, ip_err
-            # Rate limiting friendly
-            time.sleep(args.sleep)
+            limiter.wait()
+            loc_data, ip_country_err = ip_to_loc(ip, args.token)
+            loc = loc_data or {}
+            country_code = loc.get("country_code2") or loc.get("country_code")
+            country_name = loc.get("country_name")
+            lat, lon = loc.get("latitude"), loc.get("longitude")
+            with cache_lock:
+                ip_country_cache[ip] = {
+                    "country_code": country_code,
+                    "country_name": country_name,
+                    "latitude": lat,
+                    "longitude": lon,
+                    "error": ip_country_err,
+                }
 
         # Country -> carbon
         carbon = None
         carbon_err = None
         if country_code:
-            if country_code in country_carbon_cache:
-                carbon = country_carbon_cache[country_code]
+            with cache_lock:
+                carbon = country_carbon_cache.get(country_code)
+            if carbon is not None:
                 carbon_err = carbon.get("error")
             else:
-                data, err = loc_to_ci(country_code, args.token)
+                limiter.wait()
+                data, err = loc_to_ci(lat, lon, args.token)
                 if err:
-                    country_carbon_cache[country_code] = {"error": err}
+                    with cache_lock:
+                        country_carbon_cache[country_code] = {"error": err}
                     carbon_err = err
                 else:
-                    country_carbon_cache[country_code] = data
+                    with cache_lock:
+                        country_carbon_cache[country_code] = data
                     carbon = data
-                time.sleep(args.sleep)
         else:
             carbon_err = ip_country_err or "no country code"
 
         # Compose row
-        row = {
+        return {
             "ip": ip,
             "country_code": country_code or "",
             "country_name": country_name or "",
@@ -199,20 +706,18 @@ def main() -> None:
             "isEstimated": (carbon or {}).get("isEstimated", ""),
             "error": carbon_err or ip_country_err or "",
         }
-        rows.append(row)
 
-    # Save outputs
-    try:
-        write_output_csv(rows, args.output)
-    except Exception as e:
-        sys.stderr.write(f"Failed to write output CSV: {e}\n")
-        sys.exit(1)
-
-    # Save cache at the end
-    try:
-        save_cache(args.cache, ip_country_cache, country_carbon_cache)
-    except Exception as e:
-        sys.stderr.write(f"Failed to write cache: {e}\n")
+    rows = []
+    completed = 0
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = [pool.submit(resolve_ip, ip) for ip in sorted(unique_ips)]
+        for fut in as_completed(futures):
+            rows.append(fut.result())
+            completed += 1
+            if completed % 50 == 0:
+                with cache_lock:
+                    save_cache(cache_path, ip_country_cache, country_carbon_cache)
+    return rows
 
 
 if __name__ == "__main__":
@@ -1,9 +1,69 @@
 #!/usr/bin/env python3
 import argparse
 import sys
-from ast import literal_eval
 from pathlib import Path
-from typing import List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    np = None
+
+try:
+    import numba  # type: ignore
+except ImportError:
+    numba = None
+
+
+_LIST_TBL = str.maketrans({"[": " ", "]": " ", "(": " ", ")": " ", "'": " ", '"': " "})
+
+
+def parse_list_of_numbers(value: str) -> "np.ndarray":
+    """
+    Parse one string-encoded list straight into a float64 array with
+    np.fromstring's C tokenizer — no literal_eval AST and no per-element
+    Python float() calls. None entries become NaN, keeping alignment with the
+    source list.
+    """
+    if not isinstance(value, str):
+        return np.empty(0, dtype=np.float64)
+    s = value.replace("None", "nan").replace("null", "nan").translate(_LIST_TBL).strip()
+    if not s:
+        return np.empty(0, dtype=np.float64)
+    return np.fromstring(s, sep=",", dtype=np.float64)
+
+
+if numba is not None:
+
+    @numba.njit(
+        "Tuple((f8[:], f8[:]))(f8[:], f8[:], f8, f8)",
+        cache=True,
+        fastmath=True,
+        boundscheck=False,
+    )
+    def _aggregate_points(ci, rtt, xmax, ymax):  # pragma: no cover - requires numba
+        """
+        One fused pass over the flattened pairs: drop NaN/negative values and
+        apply the optional axis clips (negative sentinel = no clip), compacting
+        the survivors in place.
+        """
+        out_x = np.empty(ci.size, dtype=np.float64)
+        out_y = np.empty(ci.size, dtype=np.float64)
+        k = 0
+        for i in range(ci.size):
+            c = ci[i]
+            r = rtt[i]
+            if c != c or r != r:  # NaN
+                continue
+            if c < 0 or r < 0:
+                continue
+            if xmax >= 0 and c > xmax:
+                continue
+            if ymax >= 0 and r > ymax:
+                continue
+            out_x[k] = c
+            out_y[k] = r
+            k += 1
+        return out_x[:k], out_y[:k]
 
 
 def parse_args() -> argparse.Namespace:
@@ -24,10 +84,10 @@ def parse_args() -> argparse.Namespace:
         help="Output image file (default: output/ci_vs_rtt_scatter.png)",
     )
     parser.add_argument(
-        "--alpha",
-        type=float,
-        default=0.25,
-        help="Point transparency (0..1). Default: 0.25",
+        "--gridsize",
+        type=int,
+        default=200,
+        help="Number of hexagonal bins along the x axis. Default: 200",
     )
     parser.add_argument(
         "--dpi",
@@ -38,8 +98,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--max-points",
         type=int,
-        default=2_000_000,
-        help="Optional cap on number of plotted points for very large datasets.",
+        default=50_000_000,
+        help="Safety cap on number of aggregated points for very large datasets.",
     )
     parser.add_argument(
         "--xmax",
@@ -56,30 +116,6 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def parse_list_of_numbers(s: Optional[str]) -> List[Optional[float]]:
-    if s is None:
-        return []
-    s = str(s).strip()
-    if not s:
-        return []
-    try:
-        parsed = literal_eval(s)
-        if isinstance(parsed, (list, tuple)):
-            out: List[Optional[float]] = []
-            for x in parsed:
-                if x is None:
-                    out.append(None)
-                else:
-                    try:
-                        out.append(float(x))
-                    except Exception:
-                        out.append(None)
-            return out
-    except Exception:
-        return []
-    return []
-
-
 def main() -> int:
     args = parse_args()
     csv_path = Path(args.csv)
@@ -103,58 +139,69 @@ def main() -> int:
     ci_lists = df["ci_list"].apply(parse_list_of_numbers)
     rtt_lists = df["rtt_list"].apply(parse_list_of_numbers)
 
-    xs: List[float] = []
-    ys: List[float] = []
-
-    # Aggregate aligned pairs per row
-    for cis, rtts in zip(ci_lists, rtt_lists):
-        if not isinstance(cis, list) or not isinstance(rtts, list):
-            continue
-        n = min(len(cis), len(rtts))
-        for i in range(n):
-            ci = cis[i]
-            rtt = rtts[i]
-            if ci is None or rtt is None:
-                continue
-            # filter negative/invalid
-            if ci < 0 or rtt < 0:
-                continue
-            xs.append(float(ci))
-            ys.append(float(rtt))
-
-    # Optional filters for outliers
-    if args.xmax is not None or args.ymax is not None:
-        fxs: List[float] = []
-        fys: List[float] = []
-        for cx, cy in zip(xs, ys):
-            if args.xmax is not None and cx > args.xmax:
-                continue
-            if args.ymax is not None and cy > args.ymax:
-                continue
-            fxs.append(cx)
-            fys.append(cy)
-        xs, ys = fxs, fys
+    # Flatten the aligned pairs once (rows are already float64 arrays with
+    # NaN for None): vectorized min of the per-row sizes, one concatenate per
+    # axis, then a single filter pass — jitted when numba is available, a
+    # boolean mask otherwise. No Python-level per-point append remains.
+    ci_arrs = list(ci_lists)
+    rtt_arrs = list(rtt_lists)
+    n = np.minimum([a.size for a in ci_arrs], [a.size for a in rtt_arrs]).astype(np.intp)
+    ci_flat = (
+        np.concatenate([a[:k] for a, k in zip(ci_arrs, n)])
+        if len(ci_arrs)
+        else np.empty(0, dtype=np.float64)
+    )
+    rtt_flat = (
+        np.concatenate([a[:k] for a, k in zip(rtt_arrs, n)])
+        if len(rtt_arrs)
+        else np.empty(0, dtype=np.float64)
+    )
+
+    if numba is not None:
+        xs, ys = _aggregate_points(
+            ci_flat,
+            rtt_flat,
+            args.xmax if args.xmax is not None else -1.0,
+            args.ymax if args.ymax is not None else -1.0,
+        )
+    else:
+        mask = (
+            np.isfinite(ci_flat)
+            & np.isfinite(rtt_flat)
+            & (ci_flat >= 0)
+            & (rtt_flat >= 0)
+        )
+        if args.xmax is not None:
+            mask &= ci_flat <= args.xmax
+        if args.ymax is not None:
+            mask &= rtt_flat <= args.ymax
+        xs = ci_flat[mask]
+        ys = rtt_flat[mask]
 
     # Cap total points to protect from rendering overload
-    if len(xs) > args.max_points:
+    if xs.size > args.max_points:
         xs = xs[: args.max_points]
         ys = ys[: args.max_points]
 
-    if not xs:
+    if xs.size == 0:
         print("No points to plot after parsing/filters.")
         return 0
 
-    plt.figure(figsize=(8, 5), dpi=args.dpi)
-    plt.scatter(xs, ys, s=5, alpha=args.alpha, edgecolors="none")
-    plt.xlabel("Carbon intensity (gCO2eq/kWh)")
-    plt.ylabel("RTT (ms)")
-    plt.title("Aggregated CI vs RTT (each point: one IP candidate)")
-    plt.grid(True, alpha=0.2)
+    # hexbin rasterizes in O(N) bin adds instead of stroking one path per
+    # point, so rendering cost is bounded by the grid size, not the point
+    # count; the log color scale keeps sparse cells visible.
+    fig, ax = plt.subplots(figsize=(8, 5), dpi=args.dpi)
+    hb = ax.hexbin(xs, ys, gridsize=args.gridsize, bins="log", linewidths=0)
+    fig.colorbar(hb, ax=ax, label="count")
+    ax.set_xlabel("Carbon intensity (gCO2eq/kWh)")
+    ax.set_ylabel("RTT (ms)")
+    ax.set_title("Aggregated CI vs RTT (each cell: binned IP candidates)")
+    ax.grid(True, alpha=0.2)
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.tight_layout()
-    plt.savefig(out_path)
+    fig.tight_layout()
+    fig.savefig(out_path)
     print(f"Saved scatter plot to: {out_path}")
     return 0
 
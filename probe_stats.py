@@ -1,36 +1,52 @@
+import numpy as np
 import pandas as pd
-import ast
 import sys
-from collections import Counter
 
 def probe_statistics(csv_file, probe_id):
     # Load CSV
     df = pd.read_csv(csv_file)
 
-    # Filter for given probe
-    probe_df = df[df["probe_id"] == probe_id]
+    # Intern selected_ip as a categorical right after the read: repeated IP
+    # strings collapse to one small integer codes array, so the unique count
+    # and histogram below run on ints instead of hashing Python strings.
+    df["selected_ip"] = df["selected_ip"].astype("category")
 
-    if probe_df.empty:
+    # Filter for given probe via a sorted-index lookup instead of a boolean
+    # scan of the whole frame.
+    df = df.set_index("probe_id", drop=False).sort_index()
+    try:
+        probe_df = df.loc[[probe_id]]
+    except KeyError:
         print(f"No data found for probe_id {probe_id}")
         return
 
     # --- Unique selected IPs ---
-    unique_selected_ips = probe_df["selected_ip"].dropna().unique()
-    num_unique_selected_ips = len(unique_selected_ips)
+    # codes >= 0 drops NaN (code -1); distinct codes = distinct IPs.
+    categories = probe_df["selected_ip"].cat.categories
+    codes = probe_df["selected_ip"].cat.codes.to_numpy()
+    codes = codes[codes >= 0]
+    num_unique_selected_ips = np.unique(codes).size
 
     # --- Unique resolved IPs ---
-    all_resolved_ips = []
-    for resolved_str in probe_df["resolved_set"].dropna():
-        try:
-            resolved_list = ast.literal_eval(resolved_str)
-            all_resolved_ips.extend(resolved_list)
-        except Exception:
-            pass
-    unique_resolved_ips = set(all_resolved_ips)
-    num_unique_resolved_ips = len(unique_resolved_ips)
+    # Vectorized string ops instead of ast.literal_eval per row: strip the
+    # list decoration, split on commas, explode to one IP per element and
+    # count distinct — all in pandas C string kernels.
+    resolved = (
+        probe_df["resolved_set"]
+        .dropna()
+        .str.replace(r"[\[\]\"' ]", "", regex=True)
+        .str.split(",")
+        .explode()
+    )
+    num_unique_resolved_ips = resolved[resolved != ""].nunique()
 
     # --- Histogram of selected IPs ---
-    hist = Counter(probe_df["selected_ip"].dropna())
+    # bincount over the categorical codes is the pure-C Counter; keep only
+    # the IPs this probe actually used, most frequent first.
+    counts = np.bincount(codes, minlength=len(categories))
+    nonzero = counts.nonzero()[0]
+    order = nonzero[np.argsort(counts[nonzero])[::-1]]
+    hist = [(categories[i], int(counts[i])) for i in order]
 
     # # --- Print results ---
     print(f"\n Statistics for probe_id {probe_id}")
@@ -40,7 +56,7 @@ def probe_statistics(csv_file, probe_id):
     print(f"Unique IPs in resolved sets: {num_unique_resolved_ips}\n")
 
     print("Histogram of selected IPs:")
-    for ip, count in hist.most_common():
+    for ip, count in hist:
         print(f"  {ip:20} {count}")
     
     # import matplotlib.pyplot as plt
@@ -1,9 +1,53 @@
 #!/usr/bin/env python3
 import argparse
+import csv
+import gzip
 import sys
-from ast import literal_eval
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+from ci_common import load_correlated, parse_ip_list
+
+try:
+    import numpy as _np  # type: ignore
+except ImportError:
+    _np = None
+
+try:
+    import numba  # type: ignore
+except ImportError:
+    numba = None
+
+
+if numba is not None:
+    # Pure-input arrays are declared read-only: Series.to_numpy can hand back
+    # a readonly block view (e.g. on the chunked path), and a writable-only
+    # signature refuses those at dispatch. Writable arrays cast to readonly,
+    # so this stays valid for freshly built inputs too.
+    _i4_ro = numba.types.Array(numba.types.int32, 1, "C", readonly=True)
+    _i8_ro = numba.types.Array(numba.types.int64, 1, "C", readonly=True)
+    _f8_ro = numba.types.Array(numba.types.float64, 1, "C", readonly=True)
+
+    @numba.njit(
+        numba.types.void(_i4_ro, _i8_ro, _i4_ro, _f8_ro, _f8_ro, numba.types.float64[:]),
+        cache=True,
+        boundscheck=False,
+    )
+    def _fill_rtt_flat(codes, row_starts, sel_codes, row_rtts, means, out):  # pragma: no cover - requires numba
+        """
+        Gather per-IP mean RTTs for every (row, position) pair in one pass
+        over the flat CSR buffers, applying the selected-IP override inline.
+        NaN in `means` marks IPs without a mean (None at the boundary).
+        """
+        for i in range(row_starts.size - 1):
+            sel = sel_codes[i]
+            rv = row_rtts[i]
+            for j in range(row_starts[i], row_starts[i + 1]):
+                c = codes[j]
+                v = means[c]
+                if c == sel and rv == rv:
+                    v = rv
+                out[j] = v
 
 
 def parse_args() -> argparse.Namespace:
@@ -21,24 +65,291 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--out-csv",
         default=str(Path("output") / "rtt_enriched_correlated_ping_dns.csv"),
-        help="Output CSV path (default: output/rtt_enriched_correlated_ping_dns.csv)",
+        help=(
+            "Output CSV path (default: output/rtt_enriched_correlated_ping_dns.csv). "
+            "A .gz suffix writes gzip at compresslevel=1: ~5-10x faster than "
+            "the default level for only a few percent larger files."
+        ),
+    )
+    parser.add_argument(
+        "--format",
+        choices=("auto", "csv", "parquet", "feather"),
+        default="auto",
+        help=(
+            "Output format. 'auto' picks parquet/feather from the output "
+            "extension and csv otherwise. Parquet/feather store rtt_list as a "
+            "native list<float64> column instead of a repr string (requires "
+            "pyarrow; the --stream path is csv-only)."
+        ),
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Stream the CSV in two passes (no pandas/DataFrame): pass 1 builds "
+            "per-IP mean RTTs, pass 2 writes rows with rtt_list appended."
+        ),
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=0,
+        help=(
+            "Process the CSV in pandas chunks of this many rows (two passes, "
+            "CSV output only): bounds peak memory like --stream but keeps the "
+            "vectorized parse. 0 loads the whole frame."
+        ),
     )
     return parser.parse_args()
 
 
-def parse_ip_list(value: Optional[str]) -> List[str]:
-    if value is None:
-        return []
-    s = str(value).strip()
-    if not s:
-        return []
+def _parse_resolved_column(resolved_sets) -> List[List[str]]:
+    """
+    Vectorized parse of a resolved_set Series: strip the list decoration and
+    quotes in pandas' C string kernels, then split — one scan over the column
+    instead of a Python parser call per row. Rows the scrub reduces to
+    nothing while the raw cell still has content fall back to the general
+    parser.
+    """
+    raw = resolved_sets.fillna("").astype(str)
+    cleaned = raw.str.strip().str.strip("[]()").str.replace(r"['\"\s]", "", regex=True)
+    parsed_resolved: List[List[str]] = []
+    for row_raw, row in zip(raw.tolist(), cleaned.tolist()):
+        if row:
+            parsed_resolved.append(
+                [t for t in row.split(",") if t not in ("", "None", "null")]
+            )
+        elif row_raw.strip(" \t[]()"):
+            parsed_resolved.append(parse_ip_list(row_raw))
+        else:
+            parsed_resolved.append([])
+    return parsed_resolved
+
+
+def _build_rtt_lists(parsed_resolved, sel_ips, avg_rtt, ip_mean_rtt) -> List[List[Optional[float]]]:
+    """
+    Phase 1: one tight comprehension maps every resolved IP through the
+    mean-RTT dict — no per-row closure call, notna check or float coercion.
+    Phase 2: overrides touch only rows with a selected IP and a numeric
+    avg_rtt. Narrow resolved sets use .index() directly; wide ones build a
+    positions dict once instead of re-scanning the list.
+
+    With numba available, both phases run instead as one jitted pass over
+    flat int-coded buffers.
+    """
+    if numba is not None and _np is not None:
+        return _build_rtt_lists_jit(parsed_resolved, sel_ips, avg_rtt, ip_mean_rtt)
+    rtt_lists: List[List[Optional[float]]] = [
+        [ip_mean_rtt.get(ip) for ip in ips] for ips in parsed_resolved
+    ]
+    for i, (ips, sel) in enumerate(zip(parsed_resolved, sel_ips)):
+        if not isinstance(sel, str) or not sel:
+            continue
+        rtt = avg_rtt[i]
+        if rtt != rtt:  # NaN
+            continue
+        if len(ips) > 8:
+            idx = {ip: j for j, ip in enumerate(ips)}.get(sel, -1)
+        else:
+            try:
+                idx = ips.index(sel)
+            except ValueError:
+                idx = -1
+        if idx >= 0:
+            rtt_lists[i][idx] = float(rtt)
+    return rtt_lists
+
+
+def _build_rtt_lists_jit(parsed_resolved, sel_ips, avg_rtt, ip_mean_rtt) -> List[List[Optional[float]]]:
+    """
+    Intern every IP to an int code once, lay the rows out as flat CSR buffers
+    (codes + row_starts) and let the jitted kernel do the mean gather and
+    selected-IP override without touching Python objects per element.
+    """
+    np = _np
+    ip2code: Dict[str, int] = {}
+    codes_buf: List[int] = []
+    row_starts = np.empty(len(parsed_resolved) + 1, dtype=np.int64)
+    row_starts[0] = 0
+    for i, ips in enumerate(parsed_resolved):
+        for ip in ips:
+            code = ip2code.get(ip)
+            if code is None:
+                code = len(ip2code)
+                ip2code[ip] = code
+            codes_buf.append(code)
+        row_starts[i + 1] = len(codes_buf)
+
+    means = np.full(max(len(ip2code), 1), np.nan, dtype=np.float64)
+    for ip, v in ip_mean_rtt.items():
+        code = ip2code.get(ip)
+        if code is not None:
+            means[code] = v
+
+    sel_codes = np.fromiter(
+        (
+            ip2code.get(sel, -1) if isinstance(sel, str) else -1
+            for sel in sel_ips
+        ),
+        dtype=np.int32,
+        count=len(parsed_resolved),
+    )
+    codes = np.asarray(codes_buf, dtype=np.int32)
+    row_rtts = np.asarray(avg_rtt, dtype=np.float64)
+    out = np.empty(codes.size, dtype=np.float64)
+    _fill_rtt_flat(codes, row_starts, sel_codes, row_rtts, means, out)
+
+    flat = out.tolist()  # one bulk unbox instead of per-element numpy scalars
+    starts = row_starts.tolist()
+    return [
+        [None if v != v else v for v in flat[starts[i]:starts[i + 1]]]
+        for i in range(len(parsed_resolved))
+    ]
+
+
+def _open_out(out_path: Path):
+    # gzip level 1 trades a few percent of ratio for a several-x faster
+    # write phase — the right default for pipeline intermediates.
+    if out_path.suffix == ".gz":
+        return gzip.open(out_path, "wt", compresslevel=1, newline="", encoding="utf-8")
+    return open(out_path, "w", newline="", encoding="utf-8")
+
+
+def enrich_streaming(csv_path: Path, out_path: Path) -> int:
+    """
+    Two-pass streaming enrichment keeping memory at O(unique IPs) instead of
+    O(rows): pass 1 accumulates sum/count of avg_rtt per selected_ip, pass 2
+    re-reads the CSV and writes each row with its rtt_list appended.
+    """
+    sums: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                rtt = float(row.get("avg_rtt") or "")
+            except ValueError:
+                continue
+            if rtt < 0:
+                continue
+            ip = row.get("selected_ip") or ""
+            if not ip:
+                continue
+            sums[ip] = sums.get(ip, 0.0) + rtt
+            counts[ip] = counts.get(ip, 0) + 1
+    ip_mean_rtt = {ip: sums[ip] / counts[ip] for ip in sums}
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(csv_path, "r", newline="", encoding="utf-8") as fin, _open_out(
+        out_path
+    ) as fout:
+        reader = csv.DictReader(fin)
+        fieldnames = list(reader.fieldnames or []) + ["rtt_list"]
+        writer = csv.DictWriter(fout, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in reader:
+            resolved_ips = parse_ip_list(row.get("resolved_set"))
+            selected_ip = row.get("selected_ip") or ""
+            try:
+                row_rtt: Optional[float] = float(row.get("avg_rtt") or "")
+            except ValueError:
+                row_rtt = None
+            rtts: List[Optional[float]] = []
+            sel_idx = -1
+            for i, ip in enumerate(resolved_ips):
+                rtts.append(ip_mean_rtt.get(ip))
+                if ip == selected_ip:
+                    sel_idx = i
+            if sel_idx >= 0 and row_rtt is not None:
+                rtts[sel_idx] = row_rtt
+            row["rtt_list"] = str(rtts)
+            writer.writerow(row)
+    return 0
+
+
+def enrich_chunked(csv_path: Path, out_path: Path, chunksize: int) -> int:
+    """
+    Two-pass chunked enrichment: like --stream it holds O(unique IPs) plus
+    one chunk in memory, but each chunk goes through the same vectorized
+    resolved_set parse and rtt_list build as the full-frame path.
+    """
     try:
-        parsed = literal_eval(s)
-        if isinstance(parsed, (list, tuple)):
-            return [str(x) for x in parsed if x is not None]
-    except Exception:
-        return []
-    return []
+        import pandas as pd  # type: ignore
+    except Exception as e:
+        print(f"Pandas is required. Error: {e}", file=sys.stderr)
+        return 1
+
+    # Pass 1: per-IP sum/count of avg_rtt over the two needed columns only.
+    sums: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for chunk in pd.read_csv(
+        csv_path, usecols=["selected_ip", "avg_rtt"], chunksize=chunksize
+    ):
+        rtt = pd.to_numeric(chunk["avg_rtt"], errors="coerce")
+        ok = (rtt >= 0) & chunk["selected_ip"].notna()
+        agg = rtt[ok].groupby(chunk.loc[ok, "selected_ip"]).agg(["sum", "count"])
+        for ip, row in agg.iterrows():
+            sums[ip] = sums.get(ip, 0.0) + float(row["sum"])
+            counts[ip] = counts.get(ip, 0) + int(row["count"])
+    ip_mean_rtt = {ip: sums[ip] / counts[ip] for ip in sums}
+
+    # Pass 2: enrich and append chunk by chunk.
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    header_written = False
+    with _open_out(out_path) as fout:
+        writer = csv.writer(fout)
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            if "resolved_set" not in chunk.columns:
+                print("Input CSV lacks 'resolved_set' column", file=sys.stderr)
+                return 1
+            parsed = _parse_resolved_column(chunk["resolved_set"])
+            sel_ips = (
+                chunk["selected_ip"].to_numpy(dtype=object)
+                if "selected_ip" in chunk.columns
+                else [None] * len(chunk)
+            )
+            avg_rtt = (
+                pd.to_numeric(chunk["avg_rtt"], errors="coerce").to_numpy(dtype=float)
+                if "avg_rtt" in chunk.columns
+                else [float("nan")] * len(chunk)
+            )
+            rtt_lists = _build_rtt_lists(parsed, sel_ips, avg_rtt, ip_mean_rtt)
+            if not header_written:
+                writer.writerow(list(chunk.columns) + ["rtt_list"])
+                header_written = True
+            writer.writerows(
+                tuple(
+                    ""
+                    if v is None or v is pd.NA or (isinstance(v, float) and v != v)
+                    else v
+                    for v in row
+                )
+                + (rtts,)
+                for row, rtts in zip(chunk.itertuples(index=False, name=None), rtt_lists)
+            )
+    return 0
+
+
+def _write_arrow(df, rtt_lists, out_path: Path, fmt: str) -> int:
+    """
+    Write the enriched frame as Parquet or Feather with rtt_list as a native
+    list<float64> column: no per-row Python repr, columnar compression, and a
+    typed reload for downstream consumers. pa.array on the raw lists skips
+    pandas' object path entirely.
+    """
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.feather as feather  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+    except Exception as e:
+        print(f"pyarrow is required for {fmt} output. Error: {e}", file=sys.stderr)
+        return 1
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.append_column("rtt_list", pa.array(rtt_lists, type=pa.list_(pa.float64())))
+    if fmt == "parquet":
+        pq.write_table(table, out_path, compression="snappy")
+    else:
+        feather.write_feather(table, out_path)
+    return 0
 
 
 def main() -> int:
@@ -48,23 +359,58 @@ def main() -> int:
         print(f"Input CSV not found: {csv_path}", file=sys.stderr)
         return 1
 
+    if args.stream:
+        result = enrich_streaming(csv_path, Path(args.out_csv))
+        if result == 0:
+            print(f"Wrote RTT-enriched CSV with rtt_list column to: {args.out_csv}")
+        return result
+
+    if args.chunksize > 0:
+        result = enrich_chunked(csv_path, Path(args.out_csv), args.chunksize)
+        if result == 0:
+            print(f"Wrote RTT-enriched CSV with rtt_list column to: {args.out_csv}")
+        return result
+
     try:
+        import numpy as np  # type: ignore
         import pandas as pd  # type: ignore
     except Exception as e:
         print(f"Pandas is required. Error: {e}", file=sys.stderr)
         return 1
 
-    df = pd.read_csv(csv_path)
+    # All columns are re-written to the output, so no usecols here; dtype lets
+    # the C parser convert avg_rtt inline instead of a post-hoc coercion. The
+    # shared loader caches the parse for same-process pipeline runs. avg_rtt
+    # stays float64: the column is echoed back into the output, and a float32
+    # load picks up representation noise when csv.writer formats the values
+    # (83.234 -> 83.23400115966797).
+    df = load_correlated(str(csv_path), None, (("avg_rtt", "float64"),))
 
-    # Build per-IP RTT averages using rows where that IP is selected
-    df_rtt = df.copy()
-    df_rtt["avg_rtt"] = pd.to_numeric(df_rtt["avg_rtt"], errors="coerce")
-    df_rtt = df_rtt[df_rtt["avg_rtt"] >= 0]
-    ip_mean_rtt = (
-        df_rtt.groupby("selected_ip")["avg_rtt"].mean().to_dict()
-        if "selected_ip" in df_rtt
-        else {}
-    )
+    # Build per-IP RTT averages using rows where that IP is selected.
+    # factorize + bincount gives the grouped means in two C-level passes over
+    # contiguous arrays, skipping pandas' hash-groupby and the DataFrame copy;
+    # the dict is only materialized at the lookup boundary.
+    # One float64 view of avg_rtt shared by the grouped means and the
+    # override pass below — the column is parsed out of pandas exactly once.
+    # The loader already types it numerically, so the common case is a plain
+    # cast; to_numeric's per-value coercion runs only on object columns.
+    if "avg_rtt" not in df.columns:
+        avg_rtt = np.full(len(df), np.nan)
+    elif df["avg_rtt"].dtype.kind in "if":
+        avg_rtt = df["avg_rtt"].to_numpy(dtype=np.float64)
+    else:
+        avg_rtt = pd.to_numeric(df["avg_rtt"], errors="coerce").to_numpy(dtype=np.float64)
+
+    if "selected_ip" in df.columns:
+        codes, uniques = pd.factorize(df["selected_ip"].to_numpy())
+        ok = (avg_rtt >= 0) & (codes >= 0)
+        sums = np.bincount(codes[ok], weights=avg_rtt[ok], minlength=len(uniques))
+        counts = np.bincount(codes[ok], minlength=len(uniques))
+        means = sums / np.maximum(counts, 1)
+        # plain floats so downstream list reprs stay "123.0", not np.float64
+        ip_mean_rtt = {ip: float(means[i]) for i, ip in enumerate(uniques) if counts[i] > 0}
+    else:
+        ip_mean_rtt = {}
 
     # Parse resolved_set and build rtt_list per row
     resolved_sets = df.get("resolved_set")
@@ -72,30 +418,46 @@ def main() -> int:
         print("Input CSV lacks 'resolved_set' column", file=sys.stderr)
         return 1
 
-    parsed_resolved = resolved_sets.apply(parse_ip_list)
-
-    def build_rtt_list(resolved_ips: List[str], selected_ip: Optional[str], row_avg_rtt: Optional[float]):
-        rtts: List[Optional[float]] = []
-        for ip in resolved_ips:
-            rtt_val = ip_mean_rtt.get(ip)
-            rtts.append(float(rtt_val) if rtt_val is not None else None)
-        if selected_ip and selected_ip in resolved_ips and pd.notna(row_avg_rtt):
-            idx = resolved_ips.index(selected_ip)
-            rtts[idx] = float(row_avg_rtt)
-        return rtts
-
-    df = df.assign(
-        rtt_list=[
-            build_rtt_list(ips, sel_ip, row_rtt)
-            for ips, sel_ip, row_rtt in zip(
-                parsed_resolved, df.get("selected_ip", []), df.get("avg_rtt", [])
-            )
-        ]
+    parsed_resolved = _parse_resolved_column(resolved_sets)
+
+    sel_ips = (
+        df["selected_ip"].to_numpy(dtype=object)
+        if "selected_ip" in df.columns
+        else np.empty(len(df), dtype=object)
     )
+    rtt_lists = _build_rtt_lists(parsed_resolved, sel_ips, avg_rtt, ip_mean_rtt)
 
     out_path = Path(args.out_csv)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(out_path, index=False)
+
+    fmt = args.format
+    if fmt == "auto":
+        fmt = {".parquet": "parquet", ".feather": "feather"}.get(out_path.suffix, "csv")
+    if fmt in ("parquet", "feather"):
+        result = _write_arrow(df, rtt_lists, out_path, fmt)
+        if result == 0:
+            print(f"Wrote RTT-enriched {fmt} with rtt_list column to: {out_path}")
+        return result
+
+    df = df.assign(rtt_list=rtt_lists)
+    # Stream rows through csv.writer instead of df.to_csv, whose per-cell
+    # Python formatter is the slowest stage after the read. writerows over a
+    # generator keeps memory flat; NaN/None become empty cells as to_csv did.
+    # ArrowDtype frames surface missing values as pd.NA rather than float NaN,
+    # so it needs its own identity check (pd.isna would choke on the rtt_list
+    # cells, which are plain Python lists).
+    with _open_out(out_path) as fout:
+        writer = csv.writer(fout)
+        writer.writerow(df.columns)
+        writer.writerows(
+            tuple(
+                ""
+                if v is None or v is pd.NA or (isinstance(v, float) and v != v)
+                else v
+                for v in row
+            )
+            for row in df.itertuples(index=False, name=None)
+        )
     print(f"Wrote RTT-enriched CSV with rtt_list column to: {out_path}")
     return 0
 
@@ -0,0 +1,59 @@
+"""
+Smoke test for the ci_stats jit kernels.
+
+Feeds the kernels the same read-only np.frombuffer views the real call sites
+produce (per_row_min_ci_jit and _report_streaming_jit), so a signature that
+only accepts writable buffers fails here instead of on the first real run.
+Exits quietly when numba/numpy are not installed, since only the jit path is
+under test.
+"""
+import contextlib
+import io
+import tempfile
+from pathlib import Path
+
+import ci_stats
+
+if ci_stats.numba is None or ci_stats.np is None:
+    print("numba/numpy not available; jit smoke test skipped")
+    raise SystemExit(0)
+
+np = ci_stats.np
+
+# _parse_and_min over a read-only buffer, exactly as per_row_min_ci_jit
+# builds it.
+rows = ["[100, 50, 200]", "", "[7]"]
+lengths = np.array([len(r) for r in rows], dtype=np.int64)
+ends = np.cumsum(lengths)
+starts = ends - lengths
+buf = np.frombuffer("".join(rows).encode("ascii"), dtype=np.uint8)
+assert not buf.flags.writeable
+mins, has_value = ci_stats._parse_and_min(buf, starts, ends)
+assert mins.tolist() == [50, 0, 7], mins.tolist()
+assert has_value.tolist() == [True, False, True], has_value.tolist()
+
+# _report_streaming_jit end to end: write a small CSV and compare the report
+# against hand-computed aggregates.
+csv_text = (
+    "probe_id,timestamp,selected_ip_ci,ci_list\n"
+    '1,3600,100,"[100, 50]"\n'
+    '2,3600,200,"[200, 150]"\n'
+    '3,7200,300,"[300]"\n'
+    "4,7200,,\n"
+)
+with tempfile.TemporaryDirectory() as tmp:
+    path = Path(tmp) / "corr.csv"
+    path.write_text(csv_text, encoding="utf-8")
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        rc = ci_stats._report_streaming_jit(path)
+    assert rc == 0, rc
+    report = out.getvalue()
+
+assert "Rows considered: 3 (of 4)" in report, report
+# selected = 600, best = 50+150+300 = 500 -> 16.67% savings
+assert "Percent savings: 16.67%" in report, report
+# per-hour min: hour 1 -> 50 (x2 rows), hour 2 -> 300 (x1) -> sum 400
+assert "Percent savings vs selected: 33.33%" in report, report
+
+print("ok")
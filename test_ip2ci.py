@@ -1,6 +1,12 @@
-import sys
-from numpy.ma import count
-from ip2ci import ip_to_loc, loc_to_ci, save_cache, load_cache
+import asyncio
+import atexit
+
+try:
+    import aiohttp  # type: ignore
+except ImportError:
+    aiohttp = None
+
+from ip2ci import ip_to_loc_batch, loc_to_ci, loc_to_ci_async, save_cache, load_cache
 
 TOKEN = "052fb585189d4d6fb728f2cabb73a255"
 EM_TOKEN = "ptTcw6cZ9zS07WgBYgXP"
@@ -9,47 +15,84 @@ time = "2025-10-07T16:37:31"
 # # ip_list = ["142.250.178.238", "142.250.203.110", "172.217.168.46", "172.217.168.78"]
 ip_list = ["142.250.203.110"]
 res = {}
-# Load caches
+# Load caches once; the in-memory dicts stay authoritative for the run and
+# are flushed exactly once at interpreter exit (the JSONL log only receives
+# the delta), so an exception mid-batch still persists completed lookups.
 ip2loc_cache, loc2ci_cache = load_cache(CACHE_FILE)
+atexit.register(save_cache, CACHE_FILE, ip2loc_cache, loc2ci_cache)
 
-for ip in ip_list:
-    # get location
-    if ip in ip2loc_cache:
-        loc = ip2loc_cache[ip]
-    else:
-        loc = ip_to_loc(ip,TOKEN) # loc is (location_Data, error)
+
+# CI cache entries are keyed by "<ip>|<hour>" so freshness is a single dict
+# membership test instead of slicing and comparing the cached datetime on
+# every iteration; the bucket is computed once up front.
+hour = time[:13]
+
+
+# Dedupe up front (order-preserving) so repeated IPs in the input cost
+# one lookup each; per-IP results fan back out through the dicts.
+unique_ips = list(dict.fromkeys(ip_list))
+
+# Stage 1: locations via the bulk endpoint — one POST per 100 IPs instead of
+# one GET each, with per-IP fallback inside ip_to_loc_batch on batch failure.
+to_locate = [ip for ip in unique_ips if ip not in ip2loc_cache]
+if to_locate:
+    for ip, loc in zip(to_locate, ip_to_loc_batch(to_locate, TOKEN)):
         ip2loc_cache[ip] = loc
 
+
+# Stage 2: carbon intensity for IPs with a location and no fresh CI.
+need_ci = []
+for ip in unique_ips:
+    loc = ip2loc_cache[ip]
     if loc[1] is not None:
         print(f"Error fetching location for IP {ip}: {loc[1]}")
         continue
+    if f"{ip}|{hour}" in loc2ci_cache:
+        continue
+    need_ci.append(ip)
 
-    lat = loc[0].get("latitude")
-    lon = loc[0].get("longitude")
-
-    # get carbon intensity
-    if ip in loc2ci_cache:
-        cached_ci = loc2ci_cache[ip]
-        cached_time = cached_ci[0].get("datetime")  # Assuming datetime is stored in the cache
-        if cached_time and cached_time[:13] == time[:13]:  # Compare until the hour
-            ci = cached_ci
-        else:
-            ci = loc_to_ci(lat, lon, EM_TOKEN, time)  # ci is (data, error), where data is Dict[str, Any]
-            loc2ci_cache[ip] = ci
-    else:
-        ci = loc_to_ci(lat, lon, EM_TOKEN, time)  # ci is (data, error), where data is Dict[str, Any]
-        loc2ci_cache[ip] = ci
+
+async def run():
+    # Fetch every uncached CI lookup concurrently on one pooled session: the
+    # batch completes in roughly one RTT instead of RTT * N, with the
+    # semaphore capping concurrency below the API rate limits.
+    sem = asyncio.Semaphore(8)
+    async with aiohttp.ClientSession() as session:
+        cis = await asyncio.gather(
+            *(
+                loc_to_ci_async(
+                    ip2loc_cache[ip][0].get("latitude"),
+                    ip2loc_cache[ip][0].get("longitude"),
+                    EM_TOKEN,
+                    time,
+                    session,
+                    sem,
+                )
+                for ip in need_ci
+            )
+        )
+    for ip, ci in zip(need_ci, cis):
+        loc2ci_cache[f"{ip}|{hour}"] = ci
+
+
+if aiohttp is not None:
+    asyncio.run(run())
+else:
+    # Sequential fallback, same shape as ip2ci's threaded path: loc_to_ci
+    # reuses the module-level requests session (or urllib) per call.
+    for ip in need_ci:
+        loc = ip2loc_cache[ip][0]
+        loc2ci_cache[f"{ip}|{hour}"] = loc_to_ci(
+            loc.get("latitude"), loc.get("longitude"), EM_TOKEN, time
+        )
+
+for ip in ip_list:
+    ci = loc2ci_cache.get(f"{ip}|{hour}")
+    if ci is None:
+        continue
     if ci[1] is not None:
         print(f"Error fetching carbon intensity for IP {ip}: {ci[1]}")
         continue
     res[ip] = ci[0].get("carbonIntensity")
 
-# Save cache at the end
-try:
-    save_cache(CACHE_FILE, ip2loc_cache, loc2ci_cache)
-except Exception as e:
-    sys.stderr.write(f"Failed to write cache: {e}\n")
-
 print(res)
-
-